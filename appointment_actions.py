@@ -0,0 +1,113 @@
+from bson.objectid import ObjectId
+from pymongo import DeleteOne
+
+from notifications import appointment_recipient_ids
+from rollups import record_status_change
+
+# Admin action -> (new appointment_status or None to delete, notification wording)
+ACTIONS = {
+    "approve": ("approved", "has been approved."),
+    "reject": ("rejected", "has been rejected."),
+    "delete": (None, "has been deleted by the admin."),
+}
+
+# Fields the actions, their notifications and the dashboard rollups need
+ACTION_FIELDS = {
+    "patient_id": 1,
+    "patient_name": 1,
+    "doctor": 1,
+    "doctor_identity_number": 1,
+    "specialization": 1,
+    "date": 1,
+    "appointment_time": 1,
+    "appointment_status": 1,
+}
+
+
+def is_pending(appointment):
+    return (appointment.get("appointment_status") or "pending") == "pending"
+
+
+# Apply one admin action to many appointments, update the rollups and notify, as one
+# batch, the patients whose appointment it changed; approve/reject only touch pending
+# appointments. A constant number of round trips whatever the batch size, and only
+# the appointments this call changed count, so a stale list cannot count one twice.
+# Returns the appointments that were changed.
+def apply_appointment_action(db, appointments, action, outbox):
+    status, wording = ACTIONS[action]
+    if status is not None:
+        appointments = [appointment for appointment in appointments if is_pending(appointment)]
+    if not appointments:
+        return []
+
+    ids = [appointment["_id"] for appointment in appointments]
+    if status is None:
+        changed = _delete_appointments(db, ids)
+        record_status_change(db, changed, None)
+    else:
+        changed = _set_status(db, ids, status)
+        record_status_change(db, [{**appointment, "appointment_status": "pending"} for appointment in changed], status)
+
+    notify_patients(outbox, changed, appointment_recipient_ids(db, changed), wording)
+    return changed
+
+
+# One update_many over the pending appointments among ids, tagged with this action's
+# action_id, then one read of the tagged ones: exactly those this call moved from
+# pending to status
+def _set_status(db, ids, status):
+    action_id = ObjectId()
+    db.appointments.update_many(
+        {"_id": {"$in": ids}, "appointment_status": {"$in": [None, "pending"]}},
+        {"$set": {"appointment_status": status, "action_id": action_id}},
+    )
+    return list(db.appointments.find({"_id": {"$in": ids}, "action_id": action_id}, ACTION_FIELDS))
+
+
+# Read the stored statuses once, then delete with one bulk_write of DeleteOnes that
+# match only that status, so the rollups move from the status actually deleted. When
+# not all match, the ids are re-read: the missing ones were deleted, and those
+# approved or rejected in between are deleted again with their new status. Returns
+# the deleted appointments as stored.
+def _delete_appointments(db, ids):
+    remaining = {
+        appointment["_id"]: appointment for appointment in db.appointments.find({"_id": {"$in": ids}}, ACTION_FIELDS)
+    }
+    deleted = []
+    while remaining:
+        operations = [
+            DeleteOne({"_id": appointment_id, "appointment_status": appointment.get("appointment_status")})
+            for appointment_id, appointment in remaining.items()
+        ]
+        if db.appointments.bulk_write(operations, ordered=False).deleted_count == len(operations):
+            deleted.extend(remaining.values())
+            break
+        stored = {
+            appointment["_id"]: appointment
+            for appointment in db.appointments.find({"_id": {"$in": list(remaining)}}, ACTION_FIELDS)
+        }
+        deleted.extend(appointment for appointment_id, appointment in remaining.items() if appointment_id not in stored)
+        remaining = {
+            appointment_id: appointment
+            for appointment_id, appointment in stored.items()
+            if appointment.get("appointment_status") != remaining[appointment_id].get("appointment_status")
+        }
+    return deleted
+
+
+# Queue one notification per appointment to its patient (recipient_ids in the same order)
+def notify_patients(outbox, appointments, recipient_ids, wording):
+    outbox.enqueue_many(
+        (
+            recipient_id,
+            appointment.get("patient_name"),
+            f"Your appointment with {appointment.get('doctor')} at {appointment.get('appointment_time')} {wording}",
+        )
+        for recipient_id, appointment in zip(recipient_ids, appointments)
+    )
+
+
+# Every pending appointment matching an admin filter, e.g. one doctor on one date
+def pending_appointments(db, query):
+    pending_query = {**query, "appointment_status": {"$in": [None, "pending"]}}
+    return list(db.appointments.find(pending_query, ACTION_FIELDS))
@@ -0,0 +1,98 @@
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from notifications import DUPLICATE_KEY
+
+MIGRATION_BATCH_SIZE = 500
+
+# Appointments written before they referenced the doctor and patient by id; both
+# clauses are served by the doctor_identity_id and patient_date indexes
+UNMIGRATED_QUERY = {"$or": [{"doctor_identity_number": None}, {"patient_id": None}]}
+
+
+def _unique(pairs):
+    found = {}
+    for key, value in pairs:
+        found.setdefault(key, set()).add(value)
+    return {key: values.pop() for key, values in found.items() if len(values) == 1}
+
+
+# Doctor ids by (name, specialization) and by name alone, keeping only keys that
+# identify exactly one doctor
+def doctor_lookup(db):
+    doctors = list(db.doctors.find({}, {"_id": 0, "doctor_identity_number": 1, "name": 1, "specialization": 1}))
+    by_name_specialization = _unique(
+        ((doctor["name"], doctor["specialization"]), doctor["doctor_identity_number"]) for doctor in doctors
+    )
+    by_name = _unique((doctor["name"], doctor["doctor_identity_number"]) for doctor in doctors)
+    return by_name_specialization, by_name
+
+
+# Patient user ids for the given names, for names only one patient has
+def patient_lookup(db, names):
+    if not names:
+        return {}
+    users = db.users.find({"name": {"$in": list(names)}, "type": "patient"}, {"_id": 1, "name": 1})
+    return _unique((user["name"], user["_id"]) for user in users)
+
+
+# Returns (appointments updated, appointments skipped because their slot is taken)
+def _write_batch(db, operations):
+    if not operations:
+        return 0, 0
+    try:
+        result = db.appointments.bulk_write(operations, ordered=False)
+        return result.modified_count, 0
+    except BulkWriteError as error:
+        # Two legacy appointments for the same doctor slot: the later one keeps no doctor id
+        if any(write_error["code"] != DUPLICATE_KEY for write_error in error.details["writeErrors"]):
+            raise
+        return error.details["nModified"], len(error.details["writeErrors"])
+
+
+# One users query for the batch's patient names, then one bulk_write
+def _migrate_batch(db, batch, by_name_specialization, by_name, counts):
+    patient_ids = patient_lookup(
+        db, {appointment.get("patient_name") for appointment in batch if not appointment.get("patient_id")}
+    )
+    operations = []
+    for appointment in batch:
+        missing = [field for field in ("doctor_identity_number", "patient_id") if not appointment.get(field)]
+        fields = {}
+        if "doctor_identity_number" in missing:
+            name = appointment.get("doctor")
+            doctor_id = by_name_specialization.get((name, appointment.get("specialization"))) or by_name.get(name)
+            if doctor_id:
+                fields["doctor_identity_number"] = doctor_id
+        if "patient_id" in missing:
+            patient_id = patient_ids.get(appointment.get("patient_name"))
+            if patient_id:
+                fields["patient_id"] = patient_id
+        if len(fields) < len(missing):
+            counts["unresolved"] += 1
+        if fields:
+            still_missing = {field: None for field in fields}
+            operations.append(UpdateOne({"_id": appointment["_id"], **still_missing}, {"$set": fields}))
+    migrated, conflicts = _write_batch(db, operations)
+    counts["migrated"] += migrated
+    counts["conflicts"] += conflicts
+
+
+# Add doctor_identity_number and patient_id to appointments that only have names, in
+# batches of unordered bulk writes, while the app keeps running: every update only sets
+# fields that are still missing. Names that match no doctor or patient, or several,
+# are left for an admin. Returns {"migrated", "unresolved", "conflicts"} counts.
+def migrate_appointments(db, batch_size=MIGRATION_BATCH_SIZE):
+    by_name_specialization, by_name = doctor_lookup(db)
+    counts = {"migrated": 0, "unresolved": 0, "conflicts": 0}
+    projection = {"doctor": 1, "specialization": 1, "patient_name": 1, "doctor_identity_number": 1, "patient_id": 1}
+    cursor = db.appointments.find(UNMIGRATED_QUERY, projection).batch_size(batch_size)
+
+    batch = []
+    for appointment in cursor:
+        batch.append(appointment)
+        if len(batch) >= batch_size:
+            _migrate_batch(db, batch, by_name_specialization, by_name, counts)
+            batch = []
+    _migrate_batch(db, batch, by_name_specialization, by_name, counts)
+    return counts
@@ -0,0 +1,200 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from doctor_records import load_doctors
+from indexes import ensure_indexes
+from synthetic_data import PATIENT_PASSWORD, populate
+
+# Benchmarks for the booking, admin and notification hot paths, run through the
+# repositories against mongomock (default), a scratch database on a local mongod
+# (--uri) or the in-memory repositories (--storage memory).
+# Results are written as JSON so runs from different commits can be compared:
+#   python benchmarks.py --doctors 200,2000 --appointments 10000,100000
+#   python benchmarks.py --compare benchmark_results/old.json benchmark_results/new.json
+
+RESULTS_DIRECTORY = Path("benchmark_results")
+DATABASE_NAME = "hospital_db_benchmark"
+
+
+# Time fn() `repeats` times after one warm-up call; returns summary statistics in ms
+def measure(fn, repeats):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+        "stdev_ms": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeats": repeats,
+    }
+
+
+def hot_paths(repos, doctors, patients):
+    from main5 import authenticate_user
+    from repositories import AppointmentFilter
+    from slots import working_dates
+
+    doctor = doctors[len(doctors) // 2]
+    day = working_dates(doctor)[0]
+    specialists = [candidate for candidate in doctors if candidate.specialization == doctor.specialization]
+    patient = patients[0]
+    everything = AppointmentFilter("All", "All", ())
+    pending = AppointmentFilter("pending", doctor.doctor_identity_number, ())
+
+    return {
+        "book_appointment.free_slots": lambda: repos.appointments.free_slots(doctor, day),
+        "book_appointment.next_free_slots_specialization": lambda: repos.appointments.next_free_slots(specialists, n=10),
+        "authenticate_user": lambda: authenticate_user(repos.users, patient["username"], PATIENT_PASSWORD, "patient"),
+        "manage_appointments.first_page": lambda: (repos.appointments.page(everything), repos.appointments.count(everything)),
+        "manage_appointments.filtered_page": lambda: (repos.appointments.page(pending), repos.appointments.count(pending)),
+        "notifications.feed": lambda: (
+            repos.notifications.fetch(patient["_id"]),
+            repos.notifications.count_unread(patient["_id"]),
+        ),
+    }
+
+
+# Repositories over the populated database, or an in-memory copy of it
+def benchmark_repositories(db, storage):
+    if storage == "memory":
+        from doctor_records import Doctor
+        from memory_repositories import memory_repositories
+
+        return memory_repositories(
+            [Doctor.from_document(document) for document in db.doctors.find()],
+            db.users.find(),
+            db.appointments.find(),
+            db.notifications.find(),
+        )
+    from repositories import mongo_repositories
+
+    return mongo_repositories(db)
+
+
+# Startup seeding: a first seed into an empty database and the per-process skip path
+def bench_seeding(client, repeats):
+    from main5 import default_users
+    from seeding import seed_database
+
+    db = client[DATABASE_NAME + "_seed"]
+
+    def first_seed():
+        client.drop_database(db.name)
+        ensure_indexes(db)
+        seed_database(db, load_doctors(), default_users())
+
+    results = {"startup.seed_empty_database": measure(first_seed, repeats)}
+    results["startup.seed_already_seeded"] = measure(lambda: seed_database(db, load_doctors(), default_users()), repeats)
+    client.drop_database(db.name)
+    return results
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    if args.uri:
+        from db_config import create_client, mongo_settings
+
+        client = create_client(mongo_settings(uri=args.uri))
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("mongomock is not installed: pip install -r requirements-dev.txt, or pass --uri")
+
+        client = mongomock.MongoClient()
+
+    results = []
+    for name, stats in bench_seeding(client, args.repeats).items():
+        results.append({"name": name, "params": {}, **stats})
+        print(f"{name:55} {stats['median_ms']:10.3f} ms")
+
+    for doctor_count in args.doctors:
+        for appointment_count in args.appointments:
+            client.drop_database(DATABASE_NAME)
+            db = client[DATABASE_NAME]
+            ensure_indexes(db)
+            doctors, patients = populate(
+                db,
+                doctors=doctor_count,
+                patients=max(100, appointment_count // 50),
+                appointments=appointment_count,
+                notifications_per_patient=50,
+            )
+            params = {"doctors": doctor_count, "appointments": appointment_count}
+            for name, fn in hot_paths(benchmark_repositories(db, args.storage), doctors, patients).items():
+                stats = measure(fn, args.repeats)
+                results.append({"name": name, "params": params, **stats})
+                print(f"{name:55} {stats['median_ms']:10.3f} ms  {params}")
+    client.drop_database(DATABASE_NAME)
+
+    report = {
+        "commit": current_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "backend": "memory" if args.storage == "memory" else args.uri or "mongomock",
+        "python": platform.python_version(),
+        "results": results,
+    }
+    output = args.output or RESULTS_DIRECTORY / f"{report['commit']}-{datetime.now():%Y%m%d%H%M%S}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    Path(output).write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+# Print median ratios between two result files; exits 1 if anything regressed past the threshold
+def compare(baseline_path, candidate_path, threshold):
+    def load(path):
+        report = json.loads(Path(path).read_text())
+        return report, {(result["name"], json.dumps(result["params"], sort_keys=True)): result for result in report["results"]}
+
+    baseline_report, baseline = load(baseline_path)
+    candidate_report, candidate = load(candidate_path)
+    print(f"{baseline_report['commit']} -> {candidate_report['commit']}")
+    regressions = 0
+    for key, result in candidate.items():
+        if key not in baseline:
+            continue
+        ratio = result["median_ms"] / max(baseline[key]["median_ms"], 1e-9)
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressions += bool(flag)
+        print(f"{key[0]:55} {key[1]:40} {baseline[key]['median_ms']:10.3f} -> {result['median_ms']:10.3f} ms  x{ratio:5.2f} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the booking, admin and notification hot paths.")
+    parser.add_argument("--uri", help="MongoDB URI of a local mongod; mongomock is used if omitted")
+    parser.add_argument(
+        "--storage", choices=["mongo", "memory"], default="mongo", help="memory: copy the data into the in-memory repositories"
+    )
+    parser.add_argument("--doctors", type=lambda value: [int(n) for n in value.split(",")], default=[200, 2000])
+    parser.add_argument("--appointments", type=lambda value: [int(n) for n in value.split(",")], default=[10_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", help="results file (default: benchmark_results/<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    parser.add_argument("--threshold", type=float, default=1.2, help="median ratio counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+from rollups import record_booking
+from slot_holds import held_by_other, place_hold, release_hold, slot_filter
+from slots import next_free_slots, taken_in
+
+MY_APPOINTMENTS_LIMIT = 50
+
+
+# Raised when another session booked the slot first; carries the next free
+# (date, "HH:MM", doctor) slots for the same doctor
+class SlotTakenError(Exception):
+    def __init__(self, alternatives):
+        super().__init__("The selected slot has just been booked by someone else.")
+        self.alternatives = alternatives
+
+
+# Stored form of a new appointment
+def appointment_document(doctor, day, appointment_time, patient_id, patient_name, age, symptoms):
+    return {
+        "patient_id": patient_id,
+        "patient_name": patient_name,
+        "age": age,
+        "symptoms": symptoms,
+        "appointment_time": appointment_time,
+        "date": day.isoformat(),
+        "doctor": doctor.name,
+        "doctor_identity_number": doctor.doctor_identity_number,
+        "specialization": doctor.specialization,
+    }
+
+
+# Hold a slot for the patient while they fill in the booking form (see slot_holds.py);
+# returns when the hold expires. Raises SlotTakenError if the slot is booked or another
+# patient holds it.
+def hold_slot(db, doctor, day, appointment_time, patient_id):
+    expires_at = None
+    if not db.appointments.count_documents(slot_filter(doctor, day, appointment_time), limit=1):
+        expires_at = place_hold(db, doctor, day, appointment_time, patient_id)
+    if expires_at is None:
+        raise SlotTakenError(next_free_slots(taken_in(db, patient_id), [doctor], n=5, today=day))
+    return expires_at
+
+
+# Book a slot atomically: the unique (doctor_identity_number, date, appointment_time)
+# index lets exactly one concurrent insert win, the others get SlotTakenError, as does
+# a slot another patient holds. The patient's own hold becomes the appointment, and an
+# expired one still books if nobody took the slot meanwhile. The winner is counted in
+# the dashboard rollups.
+def book_appointment(db, doctor, day, appointment_time, patient_id, patient_name, age, symptoms):
+    if held_by_other(db, doctor, day, appointment_time, patient_id):
+        raise SlotTakenError(next_free_slots(taken_in(db, patient_id), [doctor], n=5, today=day))
+    appointment = appointment_document(doctor, day, appointment_time, patient_id, patient_name, age, symptoms)
+    try:
+        appointment_id = db.appointments.insert_one(appointment).inserted_id
+    except DuplicateKeyError:
+        raise SlotTakenError(next_free_slots(taken_in(db, patient_id), [doctor], n=5, today=day)) from None
+    release_hold(db, doctor, day, appointment_time, patient_id)
+    record_booking(db, appointment)
+    return appointment_id
+
+
+# A patient's appointments from the patient_date index: upcoming ones (today included)
+# soonest first, or past ones most recent first
+def patient_appointments(db, patient_id, today, upcoming=True, limit=MY_APPOINTMENTS_LIMIT):
+    if upcoming:
+        query = {"patient_id": patient_id, "date": {"$gte": today.isoformat()}}
+        order = ASCENDING
+    else:
+        query = {"patient_id": patient_id, "date": {"$lt": today.isoformat()}}
+        order = DESCENDING
+    projection = {"_id": 0, "date": 1, "appointment_time": 1, "doctor": 1, "specialization": 1, "appointment_status": 1}
+    cursor = db.appointments.find(query, projection).sort([("date", order), ("appointment_time", order)])
+    return list(cursor.limit(limit))
+
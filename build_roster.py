@@ -0,0 +1,20 @@
+from doctor_records import ROSTER_SNAPSHOT, normalize_doctor, read_roster_snapshot, write_roster_snapshot
+
+# Rebuild doctors_roster.json after editing doctors_data.py, doctor_records.py,
+# geocoding.py or pincodes.py; until then load_doctors falls back to parsing
+# doctors_data.py on every start
+#   python build_roster.py
+
+
+def main():
+    from doctors_data import doctors
+
+    roster = [normalize_doctor(doctor) for doctor in doctors]
+    write_roster_snapshot(roster)
+    if read_roster_snapshot() != tuple(roster):
+        raise SystemExit(f"{ROSTER_SNAPSHOT} does not read back as the roster")
+    print(f"Wrote {len(roster)} doctors to {ROSTER_SNAPSHOT} ({ROSTER_SNAPSHOT.stat().st_size / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
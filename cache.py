@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+
+from doctor_records import Doctor
+
+_MISSING = object()
+
+
+# Thread-safe LRU cache with a per-entry time-to-live and hit/miss counters
+class TTLCache:
+    def __init__(self, max_size=1024, ttl=300, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    # Return the cached value or compute, store and return it
+    def get_or_load(self, key, load):
+        value = self.get(key)
+        if value is _MISSING:
+            value = load()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+# Read-through cache for doctor lookups; admin writes must call invalidate_doctor
+class DoctorCache:
+    def __init__(self, db, max_size=1024, ttl=300):
+        self.db = db
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    # Doctor record by identity number, or None (misses are cached too)
+    def by_id(self, doctor_identity_number):
+        def load():
+            document = self.db.doctors.find_one({"doctor_identity_number": doctor_identity_number})
+            return Doctor.from_document(document) if document else None
+
+        return self.cache.get_or_load(("id", doctor_identity_number), load)
+
+    def by_specialization(self, specialization):
+        def load():
+            documents = self.db.doctors.find({"specialization": specialization})
+            return tuple(Doctor.from_document(document) for document in documents)
+
+        return self.cache.get_or_load(("specialization", specialization), load)
+
+    def specializations(self):
+        return self.cache.get_or_load(("specializations",), lambda: sorted(self.db.doctors.distinct("specialization")))
+
+    # {doctor_identity_number: "Name (identity number)"} ordered by name; names are not unique
+    def labels(self):
+        def load():
+            documents = sorted(
+                self.db.doctors.find({}, {"_id": 0, "doctor_identity_number": 1, "name": 1}),
+                key=lambda document: document["name"],
+            )
+            return {
+                document["doctor_identity_number"]: f"{document['name']} ({document['doctor_identity_number']})"
+                for document in documents
+            }
+
+        return self.cache.get_or_load(("labels",), load)
+
+    # Every stored doctor document, for the admin listing
+    def all_documents(self):
+        return self.cache.get_or_load(
+            ("all",), lambda: tuple(self.db.doctors.find().sort("doctor_identity_number", 1))
+        )
+
+    # Drop every entry a change to this doctor can affect
+    def invalidate_doctor(self, doctor_identity_number, specialization=None):
+        keys = [("id", doctor_identity_number), ("specializations",), ("labels",), ("all",)]
+        if specialization is not None:
+            keys.append(("specialization", specialization))
+        self.cache.invalidate(*keys)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,195 @@
+import os
+import sys
+import threading
+import time
+
+from pymongo import MongoClient, WriteConcern, monitoring
+from pymongo.errors import PyMongoError
+from pymongo.read_preferences import SecondaryPreferred
+
+from metrics import REGISTRY
+
+# MongoDB connection settings. Each key can be set in the [mongo] table of
+# .streamlit/secrets.toml or as an environment variable MEDCONNECT_MONGO_<KEY>
+# (e.g. MEDCONNECT_MONGO_MAX_POOL_SIZE=20), which wins over secrets. Every app
+# replica opens up to max_pool_size connections to each replica set member, so size
+# it so that replicas * max_pool_size stays below the server's connection limit.
+DEFAULT_SETTINGS = {
+    "storage": "mongo",  # "memory" runs the app on in-process repositories, without a database
+    "uri": "mongodb://localhost:27017/",
+    "database": "hospital_db",
+    "app_name": "medconnect",
+    "max_pool_size": 20,
+    "min_pool_size": 2,
+    "max_idle_time_ms": 60_000,
+    "wait_queue_timeout_ms": 2_000,  # Fail fast instead of queueing behind an exhausted pool
+    "server_selection_timeout_ms": 5_000,
+    "connect_timeout_ms": 5_000,
+    "socket_timeout_ms": 20_000,
+    "booking_write_concern": "majority",  # "majority" or a number of members
+    "booking_wtimeout_ms": 5_000,
+    "admin_reads_from_secondaries": True,
+    "admin_max_staleness_seconds": -1,  # -1: no limit, otherwise at least 90
+}
+ENV_PREFIX = "MEDCONNECT_MONGO_"
+
+
+def _coerce(value, default):
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    return str(value)
+
+
+# Defaults, then secrets, then environment variables, then the non-None keyword
+# overrides (command-line arguments of the tools)
+def mongo_settings(secrets=None, **overrides):
+    settings = dict(DEFAULT_SETTINGS)
+    for key, default in DEFAULT_SETTINGS.items():
+        if secrets and key in secrets:
+            settings[key] = _coerce(secrets[key], default)
+        if ENV_PREFIX + key.upper() in os.environ:
+            settings[key] = _coerce(os.environ[ENV_PREFIX + key.upper()], default)
+        if overrides.get(key) is not None:
+            settings[key] = _coerce(overrides[key], default)
+    return settings
+
+
+# Pool usage per server address from pymongo's connection pool events; checkout waits
+# and failures also go to the metrics registry for the Performance page
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    FIELDS = ["open", "in_use", "waiting", "peak_in_use", "peak_waiting", "checkouts", "checkout_failures", "cleared"]
+
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self._pools = {}  # (host, port) -> {field: number}
+        self._lock = threading.Lock()
+
+    def _update(self, address, **deltas):
+        with self._lock:
+            pool = self._pools.setdefault(address, dict.fromkeys(self.FIELDS, 0))
+            for field, delta in deltas.items():
+                pool[field] += delta
+            pool["peak_in_use"] = max(pool["peak_in_use"], pool["in_use"])
+            pool["peak_waiting"] = max(pool["peak_waiting"], pool["waiting"])
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, waiting=-1, checkout_failures=1)
+        self.registry.increment(
+            "mongo_pool_checkout_failures", {"address": _format_address(event.address), "reason": str(event.reason)}
+        )
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, in_use=1, checkouts=1)
+        if event.duration is not None:
+            self.registry.observe("mongo_pool_checkout_ms", {"address": _format_address(event.address)}, event.duration * 1000)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+    # Rows of {"address", field: number} for the Performance page
+    def snapshot(self):
+        with self._lock:
+            return [{"address": _format_address(address), **pool} for address, pool in sorted(self._pools.items())]
+
+
+def _format_address(address):
+    host, port = address
+    return f"{host}:{port}"
+
+
+POOL_STATS = PoolStatsListener()
+
+
+# A client with the configured pool size and timeouts; POOL_STATS sees its pool events
+def create_client(settings, event_listeners=()):
+    return MongoClient(
+        settings["uri"],
+        appname=settings["app_name"],
+        maxPoolSize=settings["max_pool_size"],
+        minPoolSize=settings["min_pool_size"],
+        maxIdleTimeMS=settings["max_idle_time_ms"],
+        waitQueueTimeoutMS=settings["wait_queue_timeout_ms"],
+        serverSelectionTimeoutMS=settings["server_selection_timeout_ms"],
+        connectTimeoutMS=settings["connect_timeout_ms"],
+        socketTimeoutMS=settings["socket_timeout_ms"],
+        event_listeners=[POOL_STATS, *event_listeners],
+    )
+
+
+# The database with the write concern bookings are confirmed with, so a booked slot
+# survives a primary failover
+def booking_database(db, settings):
+    w = settings["booking_write_concern"]
+    return db.with_options(
+        write_concern=WriteConcern(w=int(w) if w.isdigit() else w, wtimeout=settings["booking_wtimeout_ms"])
+    )
+
+
+# The database for read-only admin listings (dashboard, patient registry and its
+# export): served by a secondary when one is available, which takes the load off the
+# primary at the cost of replication lag. Pages that act on what they list keep
+# reading from the primary.
+def listing_database(db, settings):
+    if not settings["admin_reads_from_secondaries"]:
+        return db
+    return db.with_options(read_preference=SecondaryPreferred(max_staleness=settings["admin_max_staleness_seconds"]))
+
+
+# Ping the deployment; returns {"ok", "latency_ms", "error"} and, when reachable, the
+# topology type and each known server's type and round-trip time
+def health_check(client):
+    start = time.perf_counter()
+    try:
+        client.admin.command("ping")
+    except PyMongoError as error:
+        return {"ok": False, "latency_ms": (time.perf_counter() - start) * 1000, "error": str(error)}
+    latency_ms = (time.perf_counter() - start) * 1000
+    topology = client.topology_description
+    servers = [
+        {
+            "address": _format_address(address),
+            "type": server.server_type_name,
+            "round_trip_ms": None if server.round_trip_time is None else server.round_trip_time * 1000,
+        }
+        for address, server in sorted(topology.server_descriptions().items())
+    ]
+    return {"ok": True, "latency_ms": latency_ms, "error": None, "topology": topology.topology_type_name, "servers": servers}
+
+
+# Readiness probe for deployments: exits non-zero when the configured deployment is unreachable
+#   python db_config.py
+if __name__ == "__main__":
+    health = health_check(create_client(mongo_settings()))
+    if not health["ok"]:
+        print(f"MongoDB unreachable after {health['latency_ms']:.0f} ms: {health['error']}")
+        sys.exit(1)
+    print(f"MongoDB {health['topology']}, ping {health['latency_ms']:.1f} ms")
+    for server in health["servers"]:
+        round_trip = "-" if server["round_trip_ms"] is None else f"{server['round_trip_ms']:.1f} ms"
+        print(f"  {server['address']:30} {server['type']:18} {round_trip}")
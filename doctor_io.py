@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+
+from pymongo import ReplaceOne
+
+from doctor_records import normalize_doctor
+
+BATCH_SIZE = 500
+
+# Columns of the doctor export; the same layout is accepted by the import
+DOCTOR_EXPORT_FIELDS = [
+    "doctor_identity_number",
+    "name",
+    "specialization",
+    "contact",
+    "email",
+    "hospital_name",
+    "hospital_location",
+    "city",
+    "availability",
+    "working_days",
+    "rating",
+    "conditions",
+]
+
+
+# Parse an uploaded CSV or JSON-lines file row by row as (line number, raw dict);
+# lines that are not valid JSON are yielded with the ValueError in place of the dict
+def read_rows(binary_file, file_format):
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    if file_format == "CSV":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in (None, "")}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as error:
+                    yield line_number, error
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Validate and normalize rows batch by batch and diff each batch against the stored
+# documents existing_documents(identity numbers) returns; fills in summary and yields
+# the inserted or changed Doctors of every batch
+def diff_import(rows, existing_documents, summary, batch_size=BATCH_SIZE):
+    for batch in _batches(rows, batch_size):
+        doctors = {}
+        for line_number, raw in batch:
+            try:
+                if isinstance(raw, ValueError):
+                    raise raw
+                doctor = normalize_doctor(raw)
+            except (AttributeError, KeyError, TypeError, ValueError) as error:
+                summary["errors"].append((line_number, f"{type(error).__name__}: {error}"))
+                continue
+            doctors[doctor.doctor_identity_number] = doctor  # Later rows win within a file
+
+        existing = existing_documents(list(doctors))
+        changed = []
+        for identity_number, doctor in doctors.items():
+            if identity_number not in existing:
+                summary["inserted"].append(doctor)
+            elif existing[identity_number] != doctor.to_document():
+                summary["updated"].append(doctor)
+            else:
+                summary["unchanged"] += 1
+                continue
+            changed.append(doctor)
+        yield changed
+
+
+def empty_import_summary():
+    return {"inserted": [], "updated": [], "unchanged": 0, "errors": []}
+
+
+# Validate, normalize and upsert doctors keyed on doctor_identity_number, one
+# bulk_write per batch. With dry_run nothing is written and the summary is the diff
+# the import would apply. Returns {"inserted", "updated": [Doctor], "unchanged": int,
+# "errors": [(line, message)]}.
+def import_doctors(db, rows, dry_run=True, batch_size=BATCH_SIZE):
+    def existing_documents(identity_numbers):
+        return {
+            document["doctor_identity_number"]: document
+            for document in db.doctors.find({"doctor_identity_number": {"$in": identity_numbers}}, {"_id": 0})
+        }
+
+    summary = empty_import_summary()
+    for changed in diff_import(rows, existing_documents, summary, batch_size):
+        if changed and not dry_run:
+            db.doctors.bulk_write([
+                ReplaceOne({"doctor_identity_number": doctor.doctor_identity_number}, doctor.to_document(), upsert=True)
+                for doctor in changed
+            ], ordered=False)
+    return summary
+
+
+# Export row for a stored doctor document, with lists flattened for CSV
+def doctor_export_row(document):
+    row = {field: document.get(field, "") for field in DOCTOR_EXPORT_FIELDS}
+    for field in ("working_days", "conditions"):
+        if isinstance(row[field], list):
+            row[field] = ", ".join(row[field])
+    return row
+
+
+def export_rows(db, batch_size=BATCH_SIZE):
+    cursor = db.doctors.find({}, {"_id": 0}).sort("doctor_identity_number", 1).batch_size(batch_size)
+    return (doctor_export_row(document) for document in cursor)
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import re
+from dataclasses import astuple, dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+
+from geocoding import geocode_address, geojson_point
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DEFAULT_AVAILABILITY = "09:00-17:00"
+DEFAULT_WORKING_DAYS = ["Monday", "Wednesday", "Friday"]
+
+# Bump when the stored document layout changes so existing documents get re-normalized
+SCHEMA_VERSION = 3
+
+# Normalized copy of doctors_data.py written by build_roster.py, so workers skip parsing;
+# it is only used while the roster and the code that normalizes it are unchanged
+ROSTER_SOURCES = [
+    Path(__file__).with_name(name) for name in ("doctors_data.py", "doctor_records.py", "geocoding.py", "pincodes.py")
+]
+ROSTER_SNAPSHOT = Path(__file__).with_name("doctors_roster.json")
+
+
+# A doctor with every field parsed once: times as minutes after midnight,
+# working days as a Monday=bit 0 bitmask, rating as a float, and the hospital's
+# (longitude, latitude) geocoded from its PIN code (empty if it has none)
+@dataclass(slots=True)
+class Doctor:
+    doctor_identity_number: str
+    name: str
+    specialization: str
+    contact: str = ""
+    email: str = ""
+    hospital_name: str = ""
+    hospital_location: str = ""
+    city: str = ""
+    start_minute: int = 9 * 60
+    end_minute: int = 17 * 60
+    working_days_mask: int = 0
+    rating: float = 0.0
+    conditions: tuple = ()
+    coordinates: tuple = ()
+
+    @property
+    def availability(self):
+        return f"{format_minute(self.start_minute)}-{format_minute(self.end_minute)}"
+
+    @property
+    def working_days(self):
+        return [day for index, day in enumerate(WEEKDAYS) if self.working_days_mask >> index & 1]
+
+    def works_on(self, day):
+        return bool(self.working_days_mask >> day.weekday() & 1)
+
+    # Stored form: the parsed fields plus display strings so listings need no parsing either,
+    # and a GeoJSON location for the 2dsphere index
+    def to_document(self):
+        document = {
+            "doctor_identity_number": self.doctor_identity_number,
+            "name": self.name,
+            "specialization": self.specialization,
+            "contact": self.contact,
+            "email": self.email,
+            "hospital_name": self.hospital_name,
+            "hospital_location": self.hospital_location,
+            "city": self.city,
+            "availability": self.availability,
+            "start_minute": self.start_minute,
+            "end_minute": self.end_minute,
+            "working_days": self.working_days,
+            "working_days_mask": self.working_days_mask,
+            "rating": self.rating,
+            "conditions": list(self.conditions),
+            "schema_version": SCHEMA_VERSION,
+        }
+        if self.coordinates:
+            document["location"] = geojson_point(self.coordinates)
+        return document
+
+    # Build from a stored document, only parsing documents written before normalization
+    @classmethod
+    def from_document(cls, document):
+        if document.get("schema_version") != SCHEMA_VERSION:
+            return normalize_doctor(document)
+        return cls(
+            doctor_identity_number=document["doctor_identity_number"],
+            name=document["name"],
+            specialization=document["specialization"],
+            contact=document.get("contact", ""),
+            email=document.get("email", ""),
+            hospital_name=document.get("hospital_name", ""),
+            hospital_location=document.get("hospital_location", ""),
+            city=document.get("city", ""),
+            start_minute=document["start_minute"],
+            end_minute=document["end_minute"],
+            working_days_mask=document["working_days_mask"],
+            rating=document.get("rating", 0.0),
+            conditions=tuple(document.get("conditions", ())),
+            coordinates=tuple(document["location"]["coordinates"]) if "location" in document else (),
+        )
+
+
+def format_minute(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+# "09:00" -> 540
+def parse_minute(value):
+    hours, minutes = value.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time '{value}'")
+    return hours * 60 + minutes
+
+
+# "09:00-17:00" -> (540, 1020)
+def parse_availability(value):
+    parts = value.split("-")
+    if len(parts) != 2:
+        raise ValueError(f"Invalid availability '{value}'")
+    start, end = parse_minute(parts[0]), parse_minute(parts[1])
+    if start > end:
+        raise ValueError(f"Invalid availability '{value}'")
+    return start, end
+
+
+# Accepts a list of day names or a comma separated string
+def parse_working_days(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    mask = 0
+    for day in value:
+        day = day.strip().capitalize()
+        if day:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
+def parse_rating(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# Accepts a list of conditions or a comma separated string
+def parse_conditions(value):
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(condition.strip().lower() for condition in value if condition.strip())
+
+
+# "Sagar Road, Shivamogga, Karnataka 577201, India" -> "Shivamogga": the part before
+# "<state> <PIN code>", or the second to last part when there is no PIN code
+def parse_city(location):
+    parts = [part.strip() for part in location.split(",") if part.strip()]
+    for index, part in enumerate(parts):
+        if re.search(r"\b\d{6}$", part) and index > 0:
+            return parts[index - 1]
+    return parts[-2] if len(parts) > 1 else "".join(parts)
+
+
+# Convert either roster schema (hospital_name/hospital_location/availability or
+# hospital/address/working_hours/conditions) into a Doctor; raises ValueError on bad times
+def normalize_doctor(raw):
+    availability = raw.get("working_hours") or raw.get("availability") or DEFAULT_AVAILABILITY
+    start_minute, end_minute = parse_availability(availability)
+    location = raw.get("hospital_location") or raw.get("address") or ""
+    location = ", ".join(line.strip() for line in location.splitlines() if line.strip())
+    return Doctor(
+        doctor_identity_number=str(raw["doctor_identity_number"]).strip(),
+        name=raw["name"],
+        specialization=raw["specialization"],
+        contact=raw.get("contact", ""),
+        email=raw.get("email", ""),
+        hospital_name=raw.get("hospital_name") or raw.get("hospital") or "",
+        hospital_location=location,
+        city=(raw.get("city") or "").strip() or parse_city(location),
+        start_minute=start_minute,
+        end_minute=end_minute,
+        working_days_mask=parse_working_days(raw.get("working_days") or DEFAULT_WORKING_DAYS),
+        rating=parse_rating(raw.get("rating")),
+        conditions=parse_conditions(raw.get("conditions", ())),
+        coordinates=geocode_address(location) or (),
+    )
+
+
+def roster_source_hash():
+    digest = hashlib.sha256()
+    for path in ROSTER_SOURCES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+# Doctors from the snapshot, or None if it is missing or was built from other sources,
+# schema version or Doctor layout
+def read_roster_snapshot(path=ROSTER_SNAPSHOT):
+    try:
+        snapshot = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if (
+        snapshot.get("schema_version") != SCHEMA_VERSION
+        or snapshot.get("fields") != [field.name for field in fields(Doctor)]
+        or snapshot.get("source_sha256") != roster_source_hash()
+    ):
+        return None
+    return tuple(
+        Doctor(*row[:-2], conditions=tuple(row[-2]), coordinates=tuple(row[-1])) for row in snapshot["doctors"]
+    )
+
+
+# One positional row per doctor in Doctor field order (conditions and coordinates last)
+def write_roster_snapshot(doctors, path=ROSTER_SNAPSHOT):
+    snapshot = {
+        "schema_version": SCHEMA_VERSION,
+        "source_sha256": roster_source_hash(),
+        "fields": [field.name for field in fields(Doctor)],
+        "doctors": [astuple(doctor) for doctor in doctors],
+    }
+    path.write_text(json.dumps(snapshot, separators=(",", ":"), ensure_ascii=False), encoding="utf-8")
+
+
+# The bundled roster, normalized once per process: from the snapshot when it is
+# current, otherwise parsed from doctors_data.py
+@lru_cache(maxsize=None)
+def load_doctors():
+    snapshot = read_roster_snapshot()
+    if snapshot is not None:
+        return snapshot
+
+    from doctors_data import doctors
+
+    return tuple(normalize_doctor(doctor) for doctor in doctors)
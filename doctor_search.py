@@ -0,0 +1,111 @@
+from datetime import date
+
+from doctor_records import Doctor
+from geocoding import geocode_pincode, geojson_point
+from slots import first_free_slots, taken_in
+
+SEARCH_PAGE_SIZE = 10
+NEAREST_COUNT = 5
+
+# Facet name -> doctor document field
+FACET_FIELDS = {"specialization": "specialization", "hospital": "hospital_name", "city": "city"}
+SORT_OPTIONS = {"rating": "Rating", "next_free_slot": "Next free slot"}
+
+
+# $match conditions for the selected facet values, keyed by facet name
+def facet_conditions(selected):
+    return {
+        facet: {FACET_FIELDS[facet]: {"$in": list(values)}}
+        for facet, values in selected.items()
+        if values
+    }
+
+
+def _match(conditions, skip=None):
+    clauses = [condition for facet, condition in conditions.items() if facet != skip]
+    return {"$and": clauses} if clauses else {}
+
+
+# One $facet aggregation returning the matching doctors (best rated first), their count
+# and per-value counts of every facet. Each facet's counts ignore that facet's own
+# selection, so choosing a city still shows how many doctors the other cities have.
+# The leading rating $match and $sort run on the rating_identity index.
+def search_pipeline(selected, min_rating=0.0, skip=0, limit=SEARCH_PAGE_SIZE):
+    conditions = facet_conditions(selected)
+    results = [{"$match": _match(conditions)}]
+    if skip:
+        results.append({"$skip": skip})
+    if limit is not None:
+        results.append({"$limit": limit})
+    results.append({"$project": {"_id": 0}})
+
+    facets = {"results": results, "total": [{"$match": _match(conditions)}, {"$count": "count"}]}
+    for facet, field in FACET_FIELDS.items():
+        facets[facet] = [
+            {"$match": _match(conditions, skip=facet)},
+            {"$group": {"_id": "$" + field, "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+    return [
+        {"$match": {"rating": {"$gte": min_rating}}},
+        {"$sort": {"rating": -1, "doctor_identity_number": 1}},
+        {"$facet": facets},
+    ]
+
+
+# Search doctors by facet values ({"specialization": [...], "hospital": [...], "city": [...]})
+# and minimum rating, sorted by rating or by next free slot. Returns
+#   {"doctors": [(Doctor, (date, "HH:MM") or None)], "total": n, "facets": {facet: [(value, count)]}}
+# Sorting by next free slot needs every match, so that case pages in Python after one
+# slot query for all of them; rating sort pages inside the aggregation.
+def search_doctors(db, selected, min_rating=0.0, sort="rating", page=0, page_size=SEARCH_PAGE_SIZE, today=None):
+    by_slot = sort == "next_free_slot"
+    pipeline = search_pipeline(
+        selected,
+        min_rating,
+        skip=0 if by_slot else page * page_size,
+        limit=None if by_slot else page_size,
+    )
+    result = next(db.doctors.aggregate(pipeline))
+
+    doctors = [Doctor.from_document(document) for document in result["results"]]
+    next_slots = first_free_slots(taken_in(db), doctors, today)
+    if by_slot:
+        # Fully booked doctors go last; ties keep the rating order
+        doctors.sort(key=lambda doctor: next_slots.get(doctor.doctor_identity_number) or (date.max, ""))
+        doctors = doctors[page * page_size:(page + 1) * page_size]
+
+    return {
+        "doctors": [(doctor, next_slots.get(doctor.doctor_identity_number)) for doctor in doctors],
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "facets": {
+            facet: [(bucket["_id"], bucket["count"]) for bucket in result[facet] if bucket["_id"]]
+            for facet in FACET_FIELDS
+        },
+    }
+
+
+# The n doctors nearest to a PIN code, optionally of one specialization, as
+# [(Doctor, distance in km)] nearest first; raises ValueError for an unknown PIN code.
+# $geoNear runs on the location_specialization 2dsphere index.
+def nearest_doctors(db, pincode, specialization=None, n=NEAREST_COUNT):
+    coordinates = geocode_pincode(pincode)
+    if coordinates is None:
+        raise ValueError(f"Unknown PIN code '{pincode}'")
+    pipeline = [
+        {
+            "$geoNear": {
+                "near": geojson_point(coordinates),
+                "key": "location",
+                "distanceField": "distance_m",
+                "spherical": True,
+                "query": {"specialization": specialization} if specialization else {},
+            }
+        },
+        {"$limit": n},
+        {"$project": {"_id": 0}},
+    ]
+    return [
+        (Doctor.from_document(document), document["distance_m"] / 1000)
+        for document in db.doctors.aggregate(pipeline)
+    ]
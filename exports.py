@@ -0,0 +1,151 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import time
+
+CHUNK_SIZE = 1000
+
+# Prepared exports hold patient and doctor contact details, so they live in their own
+# directory and are deleted once they are EXPORT_MAX_AGE_SECONDS old: by the session
+# that made them, on logout, or by the sweeper for sessions that just went away
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "medconnect-exports")
+EXPORT_MAX_AGE_SECONDS = 15 * 60
+
+# Columns of the patient registry export and their Parquet types
+PATIENT_EXPORT_FIELDS = {
+    "name": "string",
+    "age": "int64",
+    "username": "string",
+    "phone": "string",
+    "email": "string",
+}
+
+
+# Consume a cursor in lists of at most chunk_size documents
+def iter_chunks(cursor, chunk_size=CHUNK_SIZE):
+    chunk = []
+    for document in cursor:
+        chunk.append(document)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Write the cursor as CSV to a text stream, one chunk at a time
+def write_csv(cursor, fields, output, chunk_size=CHUNK_SIZE):
+    writer = csv.DictWriter(output, fieldnames=list(fields), extrasaction="ignore")
+    writer.writeheader()
+    rows = 0
+    for chunk in iter_chunks(cursor, chunk_size):
+        writer.writerows(chunk)
+        rows += len(chunk)
+    return rows
+
+
+# Write documents as JSON lines to a text stream, one chunk at a time
+def write_jsonl(cursor, fields, output, chunk_size=CHUNK_SIZE):
+    rows = 0
+    for chunk in iter_chunks(cursor, chunk_size):
+        output.writelines(
+            json.dumps({name: document.get(name) for name in fields}, default=str) + "\n" for document in chunk
+        )
+        rows += len(chunk)
+    return rows
+
+
+def _parquet_value(value, field_type):
+    if value is None or value == "":
+        return None
+    if field_type == "int64":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+# Write the cursor as Parquet to a binary stream, one row group per chunk; needs pyarrow
+def write_parquet(cursor, fields, output, chunk_size=CHUNK_SIZE):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.type_for_alias(field_type)) for name, field_type in fields.items()])
+    rows = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in iter_chunks(cursor, chunk_size):
+            columns = {
+                name: [_parquet_value(document.get(name), field_type) for document in chunk]
+                for name, field_type in fields.items()
+            }
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            rows += len(chunk)
+        if not rows:
+            writer.write_table(schema.empty_table())
+    return rows
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+EXPORT_SUFFIXES = {"CSV": ".csv", "JSON Lines": ".jsonl", "Parquet": ".parquet"}
+
+
+# Export into a temporary file on disk so the collection is never held in memory;
+# returns (path, row count)
+def export_to_file(cursor, fields, file_format, chunk_size=CHUNK_SIZE):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    descriptor, path = tempfile.mkstemp(suffix=EXPORT_SUFFIXES[file_format], dir=EXPORT_DIR)
+    if file_format == "Parquet":
+        with os.fdopen(descriptor, "wb") as output:
+            rows = write_parquet(cursor, fields, output, chunk_size)
+    elif file_format == "JSON Lines":
+        with os.fdopen(descriptor, "w", encoding="utf-8") as output:
+            rows = write_jsonl(cursor, fields, output, chunk_size)
+    else:
+        with os.fdopen(descriptor, "w", newline="", encoding="utf-8") as output:
+            rows = write_csv(cursor, fields, output, chunk_size)
+    return path, rows
+
+
+def remove_export(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def export_expired(path, max_age=EXPORT_MAX_AGE_SECONDS):
+    try:
+        return time.time() - os.path.getmtime(path) > max_age
+    except FileNotFoundError:
+        return True
+
+
+# Delete every export older than max_age, whichever session made it
+def remove_stale_exports(max_age=EXPORT_MAX_AGE_SECONDS):
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    for entry in os.scandir(EXPORT_DIR):
+        if export_expired(entry.path, max_age):
+            remove_export(entry.path)
+
+
+# Run remove_stale_exports every `interval` seconds on a daemon thread
+def start_export_sweeper(interval=EXPORT_MAX_AGE_SECONDS / 3):
+    def sweep():
+        while True:
+            remove_stale_exports()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=sweep, name="export-sweeper", daemon=True)
+    thread.start()
+    return thread
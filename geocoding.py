@@ -0,0 +1,27 @@
+import re
+
+from pincodes import PIN_PREFIXES, PINCODES
+
+PINCODE_PATTERN = re.compile(r"\b([1-9]\d{2})\s?(\d{3})\b")
+
+
+# The first six digit PIN code in an address ("Mysuru, Karnataka 570023, India" -> "570023")
+def parse_pincode(text):
+    match = PINCODE_PATTERN.search(text or "")
+    return match.group(1) + match.group(2) if match else None
+
+
+# (longitude, latitude) of a PIN code from the bundled table, falling back to its
+# sorting district; None for PIN codes outside the table
+def geocode_pincode(pincode):
+    pincode = (pincode or "").replace(" ", "")
+    return PINCODES.get(pincode) or PIN_PREFIXES.get(pincode[:3])
+
+
+def geocode_address(text):
+    pincode = parse_pincode(text)
+    return geocode_pincode(pincode) if pincode else None
+
+
+def geojson_point(coordinates):
+    return {"type": "Point", "coordinates": list(coordinates)}
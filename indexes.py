@@ -0,0 +1,187 @@
+import sys
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+
+from doctor_records import SCHEMA_VERSION
+from notifications import RETENTION_DAYS
+
+# Indexes every collection needs; create_indexes is a no-op for ones that already exist
+INDEXES = {
+    "doctors": [
+        IndexModel([("doctor_identity_number", ASCENDING)], unique=True, name="doctor_identity_number_unique"),
+        IndexModel([("specialization", ASCENDING)], name="specialization"),
+        # Find a Doctor: the leading rating $match and $sort of the facet search
+        IndexModel([("rating", DESCENDING), ("doctor_identity_number", ASCENDING)], name="rating_identity"),
+        # Nearest doctors of a specialization ($geoNear on the geocoded hospital PIN code)
+        IndexModel([("location", GEOSPHERE), ("specialization", ASCENDING)], name="location_specialization"),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], unique=True, name="username_unique"),
+        IndexModel([("type", ASCENDING), ("_id", DESCENDING)], name="type_id"),
+        # Patients by name, for appointments and notifications stored without their user id
+        IndexModel([("name", ASCENDING), ("type", ASCENDING)], name="name_type"),
+    ],
+    "appointments": [
+        # Manage Appointments filters, each paired with the newest-first _id order
+        IndexModel([("appointment_status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+        IndexModel([("doctor_identity_number", ASCENDING), ("_id", DESCENDING)], name="doctor_identity_id"),
+        IndexModel([("date", ASCENDING), ("_id", DESCENDING)], name="date_id"),
+        # My Appointments
+        IndexModel([("patient_id", ASCENDING), ("date", ASCENDING), ("appointment_time", ASCENDING)], name="patient_date"),
+        # One appointment per doctor slot, also serving slot lookups; appointments the
+        # migration could not give a doctor id are exempt
+        IndexModel(
+            [("doctor_identity_number", ASCENDING), ("date", ASCENDING), ("appointment_time", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"doctor_identity_number": {"$exists": True}},
+            name="doctor_slot_unique",
+        ),
+    ],
+    "notifications": [
+        IndexModel([("recipient_id", ASCENDING), ("timestamp", DESCENDING)], name="recipient_timestamp"),
+        IndexModel([("recipient_id", ASCENDING), ("read", ASCENDING)], name="recipient_read"),
+        # Retention: Mongo deletes notifications RETENTION_DAYS after their timestamp
+        IndexModel([("timestamp", ASCENDING)], expireAfterSeconds=RETENTION_DAYS * 24 * 60 * 60, name="timestamp_ttl"),
+        # Only used by the one-off assign_recipient_ids migration
+        IndexModel([("recipient", ASCENDING)], name="recipient"),
+    ],
+    "slot_holds": [
+        # One hold per doctor slot, also serving the availability lookups
+        IndexModel(
+            [("doctor_identity_number", ASCENDING), ("date", ASCENDING), ("appointment_time", ASCENDING)],
+            unique=True,
+            name="doctor_slot_unique",
+        ),
+        # Releasing a patient's other holds when they hold a slot
+        IndexModel([("holder_id", ASCENDING)], name="holder_id"),
+        # Mongo deletes holds once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+    # Dashboard date range reads
+    "rollup_doctor_day": [IndexModel([("date", ASCENDING)], name="date")],
+    "rollup_specialization_day": [IndexModel([("date", ASCENDING)], name="date")],
+}
+
+# Every query shape the app issues, as (collection, filter, sort) with representative
+# values, except the INTENDED_FULL_SCANS below; keep it in step with new queries
+APP_QUERIES = [
+    ("doctors", {"doctor_identity_number": "1017"}, None),
+    ("doctors", {"doctor_identity_number": {"$in": ["1017", "8167"]}}, None),
+    ("doctors", {}, [("doctor_identity_number", ASCENDING)]),
+    ("doctors", {"specialization": "Cardiologist"}, None),
+    ("doctors", {"rating": {"$gte": 3.5}}, [("rating", DESCENDING), ("doctor_identity_number", ASCENDING)]),
+    (
+        "doctors",
+        {"location": {"$nearSphere": {"$geometry": {"type": "Point", "coordinates": [76.64, 12.3]}}}, "specialization": "Cardiologist"},
+        None,
+    ),
+    ("users", {"username": "admin"}, None),
+    ("users", {"username": "admin", "password": "", "type": "admin"}, None),
+    ("users", {"type": "patient"}, [("_id", DESCENDING)]),
+    ("users", {"type": "patient", "$or": [{"name": {"$regex": "^as", "$options": "i"}}, {"phone": {"$regex": "^as"}}]}, [("_id", DESCENDING)]),
+    ("users", {"type": "patient"}, None),
+    ("users", {"name": {"$in": ["Asha", "Ravi"]}, "type": "patient"}, None),
+    ("users", {"name": {"$in": ["Asha", "Ravi"]}}, None),
+    (
+        "appointments",
+        {"doctor_identity_number": {"$in": ["1017", "8167"]}, "date": {"$gte": "2025-01-01", "$lte": "2025-01-30"}},
+        None,
+    ),
+    ("appointments", {"doctor_identity_number": "1017", "date": "2025-01-01", "appointment_time": "10:00"}, None),
+    ("appointments", {}, [("_id", DESCENDING)]),
+    ("appointments", {"doctor_identity_number": "1017", "appointment_status": {"$in": [None, "pending"]}}, None),
+    ("appointments", {"appointment_status": {"$in": [None, "pending"]}}, [("_id", DESCENDING)]),
+    ("appointments", {"doctor_identity_number": "1017"}, [("_id", DESCENDING)]),
+    ("appointments", {"date": {"$gte": "2025-01-01", "$lte": "2025-01-30"}}, [("_id", DESCENDING)]),
+    ("appointments", {"patient_id": ObjectId(), "date": {"$gte": "2025-01-01"}}, [("date", ASCENDING), ("appointment_time", ASCENDING)]),
+    ("appointments", {"patient_id": ObjectId(), "date": {"$lt": "2025-01-01"}}, [("date", DESCENDING), ("appointment_time", DESCENDING)]),
+    ("appointments", {"$or": [{"doctor_identity_number": None}, {"patient_id": None}]}, None),
+    ("notifications", {"recipient_id": ObjectId()}, [("timestamp", DESCENDING)]),
+    ("notifications", {"recipient_id": ObjectId(), "timestamp": {"$gte": datetime(2025, 1, 1)}}, [("timestamp", DESCENDING)]),
+    ("notifications", {"recipient_id": ObjectId(), "read": False}, None),
+    (
+        "slot_holds",
+        {
+            "doctor_identity_number": {"$in": ["1017", "8167"]},
+            "date": {"$gte": "2025-01-01", "$lte": "2025-01-30"},
+            "expires_at": {"$gt": datetime(2025, 1, 1)},
+            "holder_id": {"$ne": ObjectId()},
+        },
+        None,
+    ),
+    ("slot_holds", {"holder_id": ObjectId()}, None),
+    ("slot_holds", {"doctor_identity_number": "1017", "date": "2025-01-01", "appointment_time": "10:00"}, None),
+    ("rollup_doctor_day", {"date": {"$gte": "2025-01-01", "$lte": "2025-01-30"}}, None),
+    ("rollup_specialization_day", {"date": {"$gte": "2025-01-01", "$lte": "2025-01-30"}}, None),
+]
+
+# Queries that read a whole collection on purpose, as (collection, filter, reason); an
+# index would not make them cheaper, and they run rarely
+INTENDED_FULL_SCANS = [
+    ("doctors", {}, "the whole roster (DoctorCache.labels, the symptom index, doctor_lookup), once per process or cache refresh"),
+    ("doctors", {"schema_version": {"$ne": SCHEMA_VERSION}}, "normalize_stored_doctors, only when the seed version changes"),
+    ("appointments", {}, "backfill_rollups, once per rollups version"),
+    ("notifications", {"recipient_id": {"$exists": False}}, "assign_recipient_ids, once per database"),
+]
+
+
+# Indexes replaced by the ones above; dropped so writes stop maintaining them
+RETIRED_INDEXES = {
+    "appointments": ["doctor_date_time", "doctor_id"],  # Appointments were looked up by doctor name
+}
+
+
+# Create the declared indexes for all collections and drop retired ones
+def ensure_indexes(db):
+    for collection, indexes in INDEXES.items():
+        db[collection].create_indexes(indexes)
+    for collection, names in RETIRED_INDEXES.items():
+        existing = db[collection].index_information()
+        for name in names:
+            if name in existing:
+                db[collection].drop_index(name)
+
+
+# Collect the stage names used anywhere in an explain() plan
+def plan_stages(plan):
+    stages = set()
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.add(plan["stage"])
+        for value in plan.values():
+            stages |= plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages |= plan_stages(value)
+    return stages
+
+
+# Run explain() for every app query and return the ones whose winning plan scans a collection
+def find_collection_scans(db, queries=APP_QUERIES):
+    scans = []
+    for collection, query, sort in queries:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in plan_stages(winning_plan):
+            scans.append((collection, query, sort))
+    return scans
+
+
+if __name__ == "__main__":
+    from db_config import create_client, mongo_settings
+
+    settings = mongo_settings()
+    db = create_client(settings)[settings["database"]]
+    ensure_indexes(db)
+    scans = find_collection_scans(db)
+    for collection, query, sort in scans:
+        print(f"COLLSCAN on {collection}: filter={query} sort={sort}")
+    if scans:
+        sys.exit(1)
+    print(f"All {len(APP_QUERIES)} queries use an index.")
+    for collection, query, reason in INTENDED_FULL_SCANS:
+        print(f"Intended full scan of {collection}: filter={query} ({reason})")
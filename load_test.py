@@ -0,0 +1,133 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Simulates concurrent patient and admin sessions by driving main5.py through
+# Streamlit's AppTest against the database the app is configured for, and reports
+# per-page latency percentiles. Fill the database first, e.g.
+#   python synthetic_data.py --doctors 2000 --patients 10000 --appointments 500000
+#   python load_test.py --patients 16 --admins 4 --iterations 10
+
+PATIENT_PAGES = ["Home", "Find a Doctor", "Book Appointment", "My Appointments", "Notifications", "Chatbot"]
+ADMIN_PAGES = ["Manage Appointments", "Patient Info", "Manage Doctors"]
+
+
+def _widget(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def _timed(latencies, page, action):
+    start = time.perf_counter()
+    action()
+    latencies.append((page, (time.perf_counter() - start) * 1000))
+
+
+def _open_page(app, page, latencies):
+    _timed(latencies, page, lambda: _widget(app.sidebar.radio, "Go to").set_value(page).run())
+
+
+# One patient: visit each page; on the booking page look up a doctor, hold a slot and book it
+def _patient_session(app, patient, doctor_ids, rng, latencies):
+    app.session_state.user = patient
+    app.session_state.page = "Home"
+    _timed(latencies, "Home", app.run)
+    for page in PATIENT_PAGES[1:]:
+        _open_page(app, page, latencies)
+        if page == "Book Appointment":
+            _timed(latencies, "Book Appointment: doctor lookup", lambda: _widget(
+                app.text_input, "Enter Doctor Identity Number"
+            ).set_value(rng.choice(doctor_ids)).run())
+            if any(button.label == "Submit Appointment" for button in app.button):
+                # Choosing a slot holds it; submitting turns the hold into the appointment
+                slot_choice = _widget(app.selectbox, "Choose Appointment Time")
+                _timed(latencies, "Book Appointment: hold slot", slot_choice.set_value(rng.choice(slot_choice.options)).run)
+                _widget(app.text_area, "Describe Symptoms").set_value("load test")
+                _timed(latencies, "Book Appointment: submit", _widget(app.button, "Submit Appointment").click().run)
+        elif page == "Chatbot":
+            _widget(app.text_area, "Describe your symptoms:").set_value(rng.choice(["fever and cough", "skin rash", "joint pain"]))
+            _timed(latencies, "Chatbot: search", _widget(app.button, "Find Doctors").click().run)
+
+
+def _admin_session(app, admin, latencies):
+    app.session_state.user = admin
+    app.session_state.page = "Home"
+    _timed(latencies, "Home", app.run)
+    for page in ADMIN_PAGES:
+        _open_page(app, page, latencies)
+
+
+# Runs in a worker process: `iterations` sessions of one role, returns [(page, ms)]
+def run_worker(app_path, role, users, doctor_ids, iterations, seed):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(iterations):
+        app = AppTest.from_file(app_path, default_timeout=120)
+        if role == "patient":
+            _patient_session(app, rng.choice(users), doctor_ids, rng, latencies)
+        else:
+            _admin_session(app, users[0], latencies)
+    return latencies
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def report(latencies):
+    by_page = {}
+    for page, milliseconds in latencies:
+        by_page.setdefault(page, []).append(milliseconds)
+    print(f"{'page':40} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for page, values in sorted(by_page.items()):
+        values.sort()
+        print(
+            f"{page:40} {len(values):7d} {percentile(values, 0.50):10.1f} "
+            f"{percentile(values, 0.95):10.1f} {percentile(values, 0.99):10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent app sessions and report page latency.")
+    parser.add_argument("--app", default="main5.py")
+    parser.add_argument("--uri", help="default: the app's configured URI (db_config.py)")
+    parser.add_argument("--database", help="default: the app's configured database")
+    parser.add_argument("--patients", type=int, default=8, help="concurrent patient sessions")
+    parser.add_argument("--admins", type=int, default=2, help="concurrent admin sessions")
+    parser.add_argument("--iterations", type=int, default=5, help="sessions run by each simulated user")
+    args = parser.parse_args()
+
+    from db_config import ENV_PREFIX, create_client, mongo_settings
+
+    settings = mongo_settings(uri=args.uri, database=args.database)
+    # The simulated sessions run main5.py in worker processes, which read these
+    os.environ[ENV_PREFIX + "URI"] = settings["uri"]
+    os.environ[ENV_PREFIX + "DATABASE"] = settings["database"]
+    db = create_client(settings)[settings["database"]]
+    patients = list(db.users.find({"type": "patient"}).limit(1000))
+    admins = list(db.users.find({"type": "admin"}).limit(1))
+    doctor_ids = db.doctors.distinct("doctor_identity_number")
+    if not patients or not admins or not doctor_ids:
+        parser.error("the database needs patients, an admin and doctors; run synthetic_data.py and the app once")
+
+    jobs = [("patient", patients, i) for i in range(args.patients)] + [("admin", admins, i) for i in range(args.admins)]
+    start = time.perf_counter()
+    latencies = []
+    with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = [
+            executor.submit(run_worker, args.app, role, users, doctor_ids, args.iterations, seed)
+            for role, users, seed in jobs
+        ]
+        for future in futures:
+            latencies.extend(future.result())
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs)} concurrent sessions, {len(latencies)} page runs in {elapsed:.1f} s")
+    report(latencies)
+
+
+if __name__ == "__main__":
+    main()
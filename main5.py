@@ -1,12 +1,32 @@
 import streamlit as st
-from pymongo import MongoClient
 from bson.objectid import ObjectId
-import pandas as pd
 import hashlib
-from doctors_data import doctors  # Import doctors from the external Python file
-from datetime import datetime
-from datetime import timedelta
+import os
+from datetime import datetime, timedelta
 from pathlib import Path
+from appointment_migration import migrate_appointments
+from booking import SlotTakenError
+from db_config import POOL_STATS, booking_database, create_client, health_check, listing_database, mongo_settings
+from doctor_records import load_doctors, normalize_doctor
+from doctor_search import FACET_FIELDS, NEAREST_COUNT, SEARCH_PAGE_SIZE, SORT_OPTIONS
+from doctor_io import DOCTOR_EXPORT_FIELDS, read_rows
+from exports import (
+    EXPORT_MAX_AGE_SECONDS,
+    PATIENT_EXPORT_FIELDS,
+    export_expired,
+    export_to_file,
+    parquet_available,
+    remove_export,
+    start_export_sweeper,
+)
+from indexes import ensure_indexes
+from metrics import REGISTRY, CommandMetricsListener, timed_render
+from notifications import FEED_PAGE_SIZE, LocalPushBackend, NotificationOutbox, assign_recipient_ids
+from pagination import page_cursors
+from repositories import AppointmentFilter, mongo_repositories
+from rollups import ensure_rollups
+from seeding import seed_database
+from slots import slot_count, working_dates
 
 
 def inject_custom_css():
@@ -70,34 +90,67 @@ def inject_custom_css():
     )
 
 
-# MongoDB connection
+# Connection settings from the [mongo] table of secrets.toml and MEDCONNECT_MONGO_*
+# environment variables (see db_config.py)
+@st.cache_resource
+def get_mongo_settings():
+    try:
+        secrets = st.secrets.get("mongo", {})
+    except FileNotFoundError:  # No secrets.toml
+        secrets = {}
+    return mongo_settings(secrets)
+
+# MongoDB connection; every command is timed for the Performance page
 @st.cache_resource
 def connect_to_mongodb():
-    client = MongoClient("mongodb://localhost:27017/")
-    db = client["hospital_db"]
+    settings = get_mongo_settings()
+    client = create_client(settings, event_listeners=[CommandMetricsListener()])
+    db = client[settings["database"]]
     return db
 
-# Initialize doctors in the database
-def initialize_doctors(db):
-    for doctor in doctors:
-        # Add default availability if missing
-        if "availability" not in doctor:
-            doctor["availability"] = "09:00-17:00"
-        if not db.doctors.find_one({"doctor_identity_number": doctor["doctor_identity_number"]}):
-            db.doctors.insert_one(doctor)
-
-# Update existing doctors to include availability if it's missing
-def update_existing_doctors(db):
-    for doctor in db.doctors.find():
-        if "availability" not in doctor:
-            db.doctors.update_one(
-                {"_id": doctor["_id"]},
-                {"$set": {"availability": "09:00-17:00"}}  # Add default availability
-            )
+# Create indexes, seed doctors and default users and run data migrations once per
+# process; seed_database also skips the writes when the seed version stored in Mongo
+# matches the current roster
+@st.cache_resource
+def bootstrap_database(_db):
+    ensure_indexes(_db)
+    seeded = seed_database(_db, load_doctors(), default_users())
+    assign_recipient_ids(_db)
+    migrate_appointments(_db)
+    ensure_rollups(_db)
+    return seeded
+
+# Repositories the pages read and write through, shared by all sessions of this
+# process: MongoDB, or with storage = "memory" an in-memory store seeded with the
+# roster that lives as long as the process (no database needed)
+@st.cache_resource
+def get_repositories():
+    settings = get_mongo_settings()
+    if settings["storage"] == "memory":
+        from memory_repositories import memory_repositories
+
+        return memory_repositories(load_doctors(), default_users())
+    db = connect_to_mongodb()
+    bootstrap_database(db)
+    return mongo_repositories(db, booking_database(db, settings), listing_database(db, settings))
+
+# Deletes exports left behind by sessions that ended without logging out; one sweeper
+# thread per process
+@st.cache_resource
+def get_export_sweeper():
+    return start_export_sweeper()
+
+# Symptom search index over all doctors, built once per process and kept
+# up to date by the Manage Doctors page
+@st.cache_resource
+def get_recommender(_repos):
+    from recommender import DoctorRecommender
 
-# Initialize users in the database
-def initialize_users(db):
-    users = [
+    return DoctorRecommender(_repos.doctors.all())
+
+# Default users created on first start
+def default_users():
+    return [
         {
             "username": "admin",
             "password": hash_password("admin123"),  # Hashed password
@@ -112,25 +165,20 @@ def initialize_users(db):
         #     "age": 30
         # }
     ]
-    for user in users:
-        if not db.users.find_one({"username": user["username"]}):
-            db.users.insert_one(user)
 
 # Hashing password
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 # Authentication
-def authenticate_user(db, username, password, user_type):
+def authenticate_user(users, username, password, user_type):
     hashed_password = hash_password(password)
-    user = db.users.find_one({"username": username, "password": hashed_password, "type": user_type})
+    user = users.authenticate(username, hashed_password, user_type)
     return user
 
 # Register user
-def register_user(db, username, password, name, age, phone, email):
-    if db.users.find_one({"username": username}):
-        return False
-    db.users.insert_one({
+def register_user(users, username, password, name, age, phone, email):
+    return users.register({
         "username": username,
         "password": hash_password(password),
         "type": "patient",
@@ -139,9 +187,9 @@ def register_user(db, username, password, name, age, phone, email):
         "phone": phone,
         "email": email
     })
-    return True
 
 # Home page
+@timed_render
 def render_home():
     st.title("👩‍⚕️ Welcome to MedConnect ")
 
@@ -170,131 +218,419 @@ def render_home():
     """)
 
 # Admin Patient Info page
-def render_patient_info(db):
+@timed_render
+def render_patient_info(repos):
     st.title("🩺 Patient Information 📋")
+    render_patient_list(repos)
+    render_patient_export(repos)
+
+
+# Search and pages of the patient registry; typing a search or paging reruns only this fragment
+@st.fragment
+@timed_render
+def render_patient_list(repos):
+    import pandas as pd
 
-    patients = list(db.users.find({"type": "patient"}))
+    search = st.text_input("Search by name, username or phone").strip()
+    cursors = page_cursors(st.session_state, "patient_pages", search)
+    patients, has_more = repos.users.patients_page(search, after=cursors[-1])
 
     if patients:
-        df_patients = pd.DataFrame(patients)
-        df_patients = df_patients[["name", "age", "username", "phone", "email"]]
-        st.write("### Registered Patients")
+        df_patients = pd.DataFrame(patients, columns=list(PATIENT_EXPORT_FIELDS))
+        st.write(f"### Registered Patients ({repos.users.count_patients(search)} total, page {len(cursors)})")
         st.dataframe(df_patients)
+
+        col_previous, col_next = st.columns(2)
+        col_previous.button("Previous Page", disabled=len(cursors) == 1, on_click=cursors.pop)
+        col_next.button("Next Page", disabled=not has_more, on_click=cursors.append, args=(patients[-1]["_id"],))
+    elif search:
+        st.write("No patients match your search.")
     else:
         st.write("No patients registered yet.")
 
+
+# The session's prepared export (path, rows, format), or None. The download button
+# reads the file into worker memory on every rerun while it is shown, so an export is
+# only offered for EXPORT_MAX_AGE_SECONDS and then deleted.
+def current_export(state_key):
+    export = st.session_state.get(state_key)
+    if export and export_expired(export[0]):
+        remove_export(export[0])
+        del st.session_state[state_key]
+        st.info(f"The prepared export was removed after {EXPORT_MAX_AGE_SECONDS // 60} minutes. Prepare it again to download it.")
+        return None
+    return export
+
+
+# Export the whole registry, streamed from the cursor into a temporary file
+@st.fragment
+@timed_render
+def render_patient_export(repos):
+    st.write("### Export Registry")
+    file_format = st.radio("Format", ["CSV", "Parquet"] if parquet_available() else ["CSV"], horizontal=True)
+    if st.button("Prepare Export"):
+        previous_export = st.session_state.get("patient_export")
+        if previous_export:
+            remove_export(previous_export[0])
+        path, rows = export_to_file(repos.users.all_patients(), PATIENT_EXPORT_FIELDS, file_format)
+        st.session_state.patient_export = (path, rows, file_format)
+
+    export = current_export("patient_export")
+    if export:
+        path, rows, export_format = export
+        with open(path, "rb") as export_file:
+            st.download_button(
+                f"Download {rows} Patients ({export_format})",
+                export_file,
+                file_name=f"patients{os.path.splitext(path)[1]}",
+                mime="application/octet-stream" if export_format == "Parquet" else "text/csv",
+            )
+
 # Book Appointment page
-def render_book_appointment(db, user):
+@timed_render
+def render_book_appointment(repos, user):
     st.title("📅 Book an Appointment")
 
-    doctor_id = st.text_input("Enter Doctor Identity Number").strip()
+    doctor_id = st.text_input("Enter Doctor Identity Number", key="booking_doctor_id").strip()
 
     if doctor_id:
-        doctor = db.doctors.find_one({"doctor_identity_number": doctor_id})
+        try:
+            doctor = repos.doctors.get(doctor_id)
+        except ValueError:
+            st.error("Invalid availability format. Please contact the administrator.")
+            return
         if doctor:
-            st.write(f"**Doctor Name:** {doctor['name']}")
-            st.write(f"**Specialization:** {doctor['specialization']}")
-            st.write(f"**Contact:** {doctor['contact']}")
-            st.write(f"**Email:** {doctor['email']}")
-            st.write(f"**Hospital Name:** {doctor['hospital_name']}")
-            st.write(f"**Hospital Location:** {doctor['hospital_location']}")
 
-            # Doctor's availability and working days
-            availability = doctor.get("availability", "Not Specified")
-            working_days = doctor.get("working_days", ["Monday", "Wednesday", "Friday"])  # Example working days
-            st.write(f"**Available Time:** {availability}")
-            st.write(f"**Working Days:** {', '.join(working_days)}")
-
-            if availability != "Not Specified":
-                try:
-                    doctor_available_start, doctor_available_end = [
-                        datetime.strptime(time.strip(), "%H:%M").time()
-                        for time in availability.split("-")
-                    ]
+            st.write(f"**Doctor Name:** {doctor.name}")
+            st.write(f"**Specialization:** {doctor.specialization}")
+            st.write(f"**Contact:** {doctor.contact}")
+            st.write(f"**Email:** {doctor.email}")
+            st.write(f"**Hospital Name:** {doctor.hospital_name}")
+            st.write(f"**Hospital Location:** {doctor.hospital_location}")
 
-                    # Generate a list of valid dates (today + future working days)
-                    st.write("### Select Appointment Date")
-                    today = datetime.today().date()
-                    valid_dates = [
-                        today + timedelta(days=i)
-                        for i in range(0, 30)  # Check up to 30 days ahead, including today
-                        if (today + timedelta(days=i)).strftime("%A") in working_days
-                    ]
+            # Doctor's availability and working days
+            st.write(f"**Available Time:** {doctor.availability}")
+            st.write(f"**Working Days:** {', '.join(doctor.working_days)}")
 
-                    # Allow the user to select only valid dates (today or future)
-                    selected_date = st.date_input(
-                        "Choose a Date for Appointment",
-                        min_value=today,
-                        value=valid_dates[0] if valid_dates else today,
-                    )
-
-                    if selected_date in valid_dates:
-                        selected_weekday = selected_date.strftime("%A")
-
-                        # Generate time slots for the selected day
-                        time_slots = []
-                        current_time = doctor_available_start
-                        while current_time <= doctor_available_end:
-                            time_slots.append(current_time.strftime("%H:%M"))
-                            current_time = (datetime.combine(datetime.today(), current_time) + timedelta(minutes=30)).time()
-
-                        # Fetch existing appointments for the doctor on the selected date
-                        appointments = list(db.appointments.find({"doctor": doctor["name"], "date": selected_date.isoformat()}))
-                        booked_slots = [appointment["appointment_time"] for appointment in appointments]
-
-                        # Filter out the booked slots
-                        available_slots = [slot for slot in time_slots if slot not in booked_slots]
-
-                        if available_slots:
-                            st.write("### Available Time Slots")
-                            df_slots = pd.DataFrame(available_slots, columns=["Time Slot"])
-                            st.dataframe(df_slots)
-
-                            # Allow the patient to select a time slot
-                            appointment_time = st.selectbox("Choose Appointment Time", available_slots)
-
-                            # Collect patient details
-                            name = st.text_input("Enter Patient Name", value=user['name'])
-                            age = st.number_input("Enter Age", min_value=1, max_value=120, value=user.get('age', 25))
-                            symptoms = st.text_area("Describe Symptoms")
-
-                            if st.button("Submit Appointment"):
-                                if name and symptoms:
-                                    # Book the appointment
-                                    db.appointments.insert_one({
-                                        "patient_name": name,
-                                        "age": age,
-                                        "symptoms": symptoms,
-                                        "appointment_time": appointment_time,
-                                        "date": selected_date.isoformat(),
-                                        "doctor": doctor["name"],
-                                        "specialization": doctor["specialization"]
-                                    })
-                                    st.success(f"Appointment booked successfully with {doctor['name']} on {selected_date} at {appointment_time}!")
-                                else:
-                                    st.error("Please fill in all the details.")
-                        else:
-                            st.error("No available time slots for this doctor on the selected date.")
-                    else:
-                        st.error("Invalid date selected. Please choose today or an upcoming working day.")
-                except ValueError:
-                    st.error("Invalid availability format. Please contact the administrator.")
-            else:
-                st.error("Doctor availability is not specified.")
+            render_booking_slots(repos, user, doctor)
         else:
             st.error(f"No doctor found with Identity Number '{doctor_id}'.")
     else:
         st.write("Please enter a valid Doctor Identity Number.")
+        render_earliest_slots(repos)
+
+
+# My Appointments page: the logged-in patient's upcoming and past appointments
+@timed_render
+def render_my_appointments(repos, user):
+    import pandas as pd
+
+    st.title("🗓️ My Appointments")
+
+    today = datetime.today().date()
+    for heading, upcoming in (("Upcoming", True), ("Past", False)):
+        st.subheader(heading)
+        appointments = repos.appointments.for_patient(user["_id"], today, upcoming=upcoming)
+        if appointments:
+            st.dataframe(pd.DataFrame(
+                [
+                    {
+                        "Date": appointment["date"],
+                        "Time": appointment.get("appointment_time", ""),
+                        "Doctor": appointment.get("doctor", ""),
+                        "Specialization": appointment.get("specialization", ""),
+                        "Status": (appointment.get("appointment_status") or "pending").capitalize(),
+                    }
+                    for appointment in appointments
+                ]
+            ), hide_index=True)
+        else:
+            st.write(f"No {heading.lower()} appointments.")
+
+
+# Next free slots, date picker, free slots and booking form of one doctor. Changing the
+# date or the slot, or booking, reruns only this fragment (two slot queries); the form
+# fields cause no rerun until submit.
+@st.fragment
+@timed_render
+def render_booking_slots(repos, user, doctor):
+    import pandas as pd
+
+    # Result of the submit callback, which runs before this fragment so the slots below are current
+    for level, message in st.session_state.pop("booking_messages", []):
+        getattr(st, level)(message)
+
+    # Next free slots across the coming 30 days; here so a hold or booking updates them
+    next_slots = repos.appointments.next_free_slots([doctor], n=5, holder_id=user["_id"])
+    if next_slots:
+        st.write("**Next Available:** " + ", ".join(f"{day} {time}" for day, time, _ in next_slots))
+
+    # Valid dates are today and future working days, up to 30 days ahead
+    st.write("### Select Appointment Date")
+    today = datetime.today().date()
+    valid_dates = working_dates(doctor, today)
+
+    # Allow the user to select only valid dates (today or future)
+    selected_date = st.date_input(
+        "Choose a Date for Appointment",
+        min_value=today,
+        value=valid_dates[0] if valid_dates else today,
+        key=f"booking_date_{doctor.doctor_identity_number}",
+        on_change=clear_booking_time,
+    )
+
+    if selected_date not in valid_dates:
+        st.error("Invalid date selected. Please choose today or an upcoming working day.")
+        return
+
+    # 30-minute slots of the selected day minus the booked ones and those other patients hold
+    available_slots = repos.appointments.free_slots(doctor, selected_date, holder_id=user["_id"])
+    if not available_slots:
+        st.error("No available time slots for this doctor on the selected date.")
+        return
+
+    st.write("### Available Time Slots")
+    df_slots = pd.DataFrame(available_slots, columns=["Time Slot"])
+    st.dataframe(df_slots)
+
+    # Choosing a slot holds it for this patient while they fill in the form
+    appointment_time = st.selectbox(
+        "Choose Appointment Time",
+        available_slots,
+        index=None,
+        placeholder="Select a time slot",
+        key="booking_time",
+        on_change=hold_booking_slot,
+        args=(repos, user, doctor, selected_date),
+    )
+    hold = st.session_state.get("booking_hold")
+    if appointment_time and hold and hold[:3] == (doctor.doctor_identity_number, selected_date, appointment_time):
+        st.info(
+            f"The {appointment_time} slot is held for you until {hold[3].astimezone():%H:%M}. "
+            "Submit the form before then to keep it."
+        )
+
+    with st.form("booking_form"):
+        # Collect patient details
+        st.text_input("Enter Patient Name", value=user['name'], key="booking_name")
+        st.number_input("Enter Age", min_value=1, max_value=120, value=user.get('age', 25), key="booking_age")
+        st.text_area("Describe Symptoms", key="booking_symptoms")
+        st.form_submit_button("Submit Appointment", on_click=submit_booking, args=(repos, user, doctor, selected_date))
+
+
+# A slot chosen on another date is not held on the new one, so the patient chooses again
+def clear_booking_time():
+    st.session_state.booking_time = None
+
+
+# Change callback of the time slot choice: hold the chosen slot for this patient, or
+# clear the choice if someone else got it first
+def hold_booking_slot(repos, user, doctor, selected_date):
+    state = st.session_state
+    appointment_time = state.booking_time
+    if appointment_time is None:
+        return
+    try:
+        expires_at = repos.appointments.hold(doctor, selected_date, appointment_time, user["_id"])
+        state.booking_hold = (doctor.doctor_identity_number, selected_date, appointment_time, expires_at)
+    except SlotTakenError as error:
+        state.booking_time = None
+        state.booking_messages = slot_taken_messages(appointment_time, selected_date, error)
+
+
+# Submit callback of the booking form; books the chosen slot from the form values in
+# session state and leaves the outcome in booking_messages for the fragment to show
+def submit_booking(repos, user, doctor, selected_date):
+    state = st.session_state
+    appointment_time, name, age, symptoms = (
+        state.booking_time, state.booking_name, state.booking_age, state.booking_symptoms
+    )
+    if not appointment_time:
+        state.booking_messages = [("error", "Please choose a time slot.")]
+        return
+    if not (name and symptoms):
+        state.booking_messages = [("error", "Please fill in all the details.")]
+        return
+    # Book the appointment, which turns the hold into it; fails if the hold expired and
+    # another patient took the slot meanwhile
+    try:
+        repos.appointments.book(doctor, selected_date, appointment_time, user["_id"], name, age, symptoms)
+        messages = [("success", f"Appointment booked successfully with {doctor.name} on {selected_date} at {appointment_time}!")]
+        state.booking_time = None
+        state.pop("booking_hold", None)
+    except SlotTakenError as error:
+        messages = slot_taken_messages(appointment_time, selected_date, error)
+    state.booking_messages = messages
+
+
+def slot_taken_messages(appointment_time, selected_date, error):
+    messages = [("error", f"The {appointment_time} slot on {selected_date} was just taken by another patient.")]
+    if error.alternatives:
+        messages.append(("write", "**Next free slots:** " + ", ".join(f"{day} {time}" for day, time, _ in error.alternatives)))
+    return messages
+
+
+# Earliest free slots across every doctor of a specialization; picking another
+# specialization reruns only this fragment
+@st.fragment
+@timed_render
+def render_earliest_slots(repos):
+    import pandas as pd
+
+    with st.expander("Don't know the doctor? Find the earliest slots by specialization"):
+        specialization = st.selectbox("Specialization", repos.doctors.specializations())
+        if specialization:
+            slots = repos.appointments.next_free_slots(repos.doctors.by_specialization(specialization), n=10)
+            if slots:
+                st.dataframe(pd.DataFrame(
+                    [
+                        {
+                            "Date": day.isoformat(),
+                            "Time": time,
+                            "Identity Number": doctor.doctor_identity_number,
+                            "Doctor": doctor.name,
+                            "Hospital": doctor.hospital_name,
+                        }
+                        for day, time, doctor in slots
+                    ]
+                ))
+            else:
+                st.write("No free slots in the next 30 days.")
+
+
+# Find a Doctor page: facet filters with counts, sorted and paginated results
+@timed_render
+def render_find_doctor(repos):
+    import pandas as pd
+
+    st.title("🔎 Find a Doctor")
+    render_nearest_doctors(repos)
+
+    facet_labels = {"specialization": "Specialization", "hospital": "Hospital", "city": "City"}
+    selected = {facet: st.session_state.get(f"search_{facet}", []) for facet in FACET_FIELDS}
+    col_rating, col_sort = st.columns(2)
+    min_rating = col_rating.slider("Minimum Rating", 0.0, 5.0, 0.0, 0.5)
+    sort = col_sort.radio("Sort by", list(SORT_OPTIONS), format_func=SORT_OPTIONS.get, horizontal=True)
+
+    pages = page_cursors(
+        st.session_state, "doctor_search_pages", (tuple(map(tuple, selected.values())), min_rating, sort)
+    )
+    page = len(pages) - 1
+    result = repos.doctors.search(selected, min_rating, sort, page)
+
+    # Facet options come from the counts of this search; selected values stay listed
+    filter_columns = st.columns(len(FACET_FIELDS))
+    for column, facet in zip(filter_columns, FACET_FIELDS):
+        counts = dict(result["facets"][facet])
+        options = sorted(set(counts) | set(selected[facet]))
+        column.multiselect(
+            facet_labels[facet],
+            options,
+            key=f"search_{facet}",
+            format_func=lambda value, counts=counts: f"{value} ({counts.get(value, 0)})",
+        )
+
+    total = result["total"]
+    if not result["doctors"]:
+        st.write("No doctors match these filters.")
+        return
+    first = page * SEARCH_PAGE_SIZE + 1
+    st.write(f"Showing {first}-{first + len(result['doctors']) - 1} of {total} doctors")
+    st.dataframe(pd.DataFrame(
+        [
+            {
+                "Identity Number": doctor.doctor_identity_number,
+                "Name": doctor.name,
+                "Specialization": doctor.specialization,
+                "Hospital": doctor.hospital_name,
+                "City": doctor.city,
+                "Rating": doctor.rating,
+                "Next Free Slot": f"{next_slot[0]} {next_slot[1]}" if next_slot else "None in 30 days",
+            }
+            for doctor, next_slot in result["doctors"]
+        ]
+    ), hide_index=True)
+
+    col_previous, col_next = st.columns(2)
+    col_previous.button("Previous Page", disabled=page == 0, on_click=pages.pop)
+    col_next.button("Next Page", disabled=first + len(result["doctors"]) > total, on_click=pages.append, args=(page + 1,))
+
+    # Jump to the booking page with the chosen doctor filled in
+    names = {doctor.doctor_identity_number: f"{doctor.name} ({doctor.doctor_identity_number})" for doctor, _ in result["doctors"]}
+    chosen = st.selectbox("Book with", list(names), format_func=names.get)
+    st.button("Book Appointment", on_click=open_booking, args=(chosen,))
+
+
+# Nearest doctors to the patient's PIN code, geocoded offline
+@timed_render
+def render_nearest_doctors(repos):
+    import pandas as pd
+
+    with st.expander("Find the nearest doctors to your PIN code"):
+        col_pincode, col_specialization, col_count = st.columns([2, 3, 1])
+        pincode = col_pincode.text_input("PIN Code", max_chars=7).strip()
+        specialization = col_specialization.selectbox(
+            "Specialization", ["Any"] + repos.doctors.specializations(), key="nearest_specialization"
+        )
+        count = col_count.number_input("Doctors", min_value=1, max_value=50, value=NEAREST_COUNT)
+        if pincode:
+            try:
+                nearest = repos.doctors.nearest(pincode, None if specialization == "Any" else specialization, count)
+            except ValueError:
+                st.error(f"PIN code '{pincode}' is not in Karnataka or not known to the app.")
+                return
+            if nearest:
+                st.dataframe(pd.DataFrame(
+                    [
+                        {
+                            "Identity Number": doctor.doctor_identity_number,
+                            "Name": doctor.name,
+                            "Specialization": doctor.specialization,
+                            "Hospital": doctor.hospital_name,
+                            "Location": doctor.hospital_location,
+                            "Distance (km)": round(distance, 1),
+                        }
+                        for doctor, distance in nearest
+                    ]
+                ), hide_index=True)
+            else:
+                st.write("No doctors found.")
+
+
+# Book Appointment button callback: switch pages with the chosen doctor filled in
+def open_booking(doctor_id):
+    st.session_state.booking_doctor_id = doctor_id
+    st.session_state.navigation = "Book Appointment"
 
 
 # Chatbot page
-def render_chatbot():
+@timed_render
+def render_chatbot(repos):
+    import pandas as pd
+
     st.title("🤖 AI-Powered Chatbot 🗨️")
 
-    # user_input = st.text_input("Describe your symptoms:")
-    # if st.button("Analyze Symptoms"):
-    #     st.write("Symptom analysis will appear here (AI integration placeholder).")
-    
+    user_input = st.text_area("Describe your symptoms:")
+    if st.button("Find Doctors"):
+        recommendations = get_recommender(repos).recommend(user_input, k=5)
+        if recommendations:
+            st.write("### Recommended Doctors")
+            st.dataframe(pd.DataFrame(
+                [
+                    {
+                        "Identity Number": doctor.doctor_identity_number,
+                        "Name": doctor.name,
+                        "Specialization": doctor.specialization,
+                        "Hospital": doctor.hospital_name,
+                        "Rating": doctor.rating,
+                    }
+                    for doctor, _ in recommendations
+                ]
+            ))
+            st.write("Use the Identity Number on the Book Appointment page to book a slot.")
+        else:
+            st.write("No matching doctors found. Try describing your symptoms differently.")
+
     # Add a link to the Streamlit app
     st.markdown(
         """
@@ -307,15 +643,22 @@ def render_chatbot():
 
 
 # Manage Doctors page
-def render_manage_doctors(db):
+@timed_render
+def render_manage_doctors(repos):
+    import pandas as pd
+
     st.title("🩺 Manage Doctors 👨‍⚕️👩‍⚕️")
 
-    doctors_in_db = list(db.doctors.find())
+    doctors_in_db = repos.doctors.all_documents()
     if len(doctors_in_db) > 0:
-        df_doctors = pd.DataFrame(doctors_in_db)
-        df_doctors["_id"] = df_doctors["_id"].astype(str)
+        df_doctors = pd.DataFrame(list(doctors_in_db))
+        if "_id" in df_doctors:
+            df_doctors["_id"] = df_doctors["_id"].astype(str)
         st.write("### Doctors List")
         st.write(df_doctors)
+        cache_stats = repos.doctors.cache_stats()
+        if cache_stats:
+            st.caption(f"Doctor cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['size']} entries")
 
     # Add a new doctor
     st.write("### Add New Doctor")
@@ -331,22 +674,28 @@ def render_manage_doctors(db):
         submitted = st.form_submit_button("Add Doctor")
         if submitted:
             if doctor_id and name and specialization:
-                existing_doctor = db.doctors.find_one({"doctor_identity_number": doctor_id})
+                existing_doctor = repos.doctors.get(doctor_id)
                 if existing_doctor:
                     st.error("A doctor with this identity number already exists.")
                 else:
-                    db.doctors.insert_one({
-                        "doctor_identity_number": doctor_id,
-                        "name": name,
-                        "specialization": specialization,
-                        "contact": contact,
-                        "email": email,
-                        "hospital_name": hospital_name,
-                        "hospital_location": hospital_location,
-                        "availability": availability or "09:00-17:00"  # Default if not provided
-                    })
-                    st.success(f"Doctor {name} added successfully.")
-                    st.experimental_rerun()
+                    try:
+                        doctor = normalize_doctor({
+                            "doctor_identity_number": doctor_id,
+                            "name": name,
+                            "specialization": specialization,
+                            "contact": contact,
+                            "email": email,
+                            "hospital_name": hospital_name,
+                            "hospital_location": hospital_location,
+                            "availability": availability  # Defaults to 09:00-17:00 if not provided
+                        })
+                    except ValueError:
+                        st.error("Invalid availability format. Use HH:MM-HH:MM, e.g. 09:00-17:00.")
+                    else:
+                        repos.doctors.add(doctor)
+                        get_recommender(repos).add_doctor(doctor)
+                        st.success(f"Doctor {name} added successfully.")
+                        st.rerun()
             else:
                 st.error("Please fill all required fields.")
 
@@ -357,33 +706,141 @@ def render_manage_doctors(db):
         delete_submitted = st.form_submit_button("Delete Doctor")
         if delete_submitted:
             if delete_doctor_id:
-                doctor_to_delete = db.doctors.find_one({"doctor_identity_number": delete_doctor_id})
-                if doctor_to_delete:
-                    db.doctors.delete_one({"doctor_identity_number": delete_doctor_id})
+                if repos.doctors.delete(delete_doctor_id):
+                    get_recommender(repos).remove_doctor(delete_doctor_id)
                     st.success(f"Doctor with Identity Number {delete_doctor_id} has been deleted.")
-                    st.experimental_rerun()
+                    st.rerun()
                 else:
                     st.error(f"No doctor found with Identity Number {delete_doctor_id}.")
             else:
                 st.error("Please enter a valid Doctor Identity Number.")
 
+    render_doctor_import_export(repos)
+
+
+# Bulk import (CSV or JSON lines, dry run first) and streaming export of the roster;
+# its widgets rerun only this fragment, except a real import, which refreshes the page
+@st.fragment
+@timed_render
+def render_doctor_import_export(repos):
+    import pandas as pd
+
+    st.write("### Import Doctors")
+    st.write("Columns: " + ", ".join(DOCTOR_EXPORT_FIELDS) + ". Existing doctors are matched on the identity number.")
+    uploaded_file = st.file_uploader("Doctor File", type=["csv", "jsonl"])
+    dry_run = st.checkbox("Dry run (only show what would change)", value=True)
+    if uploaded_file and st.button("Import Doctors"):
+        file_format = "CSV" if uploaded_file.name.lower().endswith(".csv") else "JSON Lines"
+        summary = repos.doctors.import_rows(read_rows(uploaded_file, file_format), dry_run=dry_run)
+        st.session_state.doctor_import = (dry_run, summary)
+        if not dry_run and (summary["inserted"] or summary["updated"]):
+            recommender = get_recommender(repos)
+            for doctor in summary["inserted"] + summary["updated"]:
+                recommender.add_doctor(doctor)
+            st.rerun()  # The whole page, so the doctors list shows the import
+
+    # Summary of the last import, shown once
+    if "doctor_import" in st.session_state:
+        dry_run, summary = st.session_state.pop("doctor_import")
+        prefix = "Would insert" if dry_run else "Inserted"
+        st.write(
+            f"{prefix} {len(summary['inserted'])}, {'update' if dry_run else 'updated'} "
+            f"{len(summary['updated'])}, {summary['unchanged']} unchanged, {len(summary['errors'])} invalid rows."
+        )
+        for label, doctors in (("New", summary["inserted"]), ("Changed", summary["updated"])):
+            if doctors:
+                st.write(f"**{label}:** " + ", ".join(
+                    f"{doctor.doctor_identity_number} ({doctor.name})" for doctor in doctors[:50]
+                ) + (" ..." if len(doctors) > 50 else ""))
+        if summary["errors"]:
+            st.dataframe(pd.DataFrame(summary["errors"][:100], columns=["Line", "Error"]))
+
+    st.write("### Export Doctors")
+    file_format = st.radio("Export Format", ["CSV", "JSON Lines"], horizontal=True)
+    if st.button("Prepare Doctor Export"):
+        previous_export = st.session_state.get("doctor_export")
+        if previous_export:
+            remove_export(previous_export[0])
+        path, rows = export_to_file(repos.doctors.export_rows(), DOCTOR_EXPORT_FIELDS, file_format)
+        st.session_state.doctor_export = (path, rows, file_format)
+
+    export = current_export("doctor_export")
+    if export:
+        path, rows, export_format = export
+        with open(path, "rb") as export_file:
+            st.download_button(
+                f"Download {rows} Doctors ({export_format})",
+                export_file,
+                file_name=f"doctors{os.path.splitext(path)[1]}",
+                mime="text/csv" if export_format == "CSV" else "application/jsonl",
+            )
+
 # Manage Appointments page
-def render_manage_appointments(db):
+@timed_render
+def render_manage_appointments(repos):
     st.title("📋 Manage Appointments 📅")
-    
-    # Fetch all appointments
-    appointments = list(db.appointments.find())
-    
+    render_appointment_list(repos)
+
+
+# Filters, bulk actions and the paginated list; filter changes, actions and page
+# navigation rerun only this fragment
+@st.fragment
+@timed_render
+def render_appointment_list(repos):
+    # Filters
+    col_status, col_doctor, col_dates = st.columns(3)
+    status_filter = col_status.selectbox("Status", ["All", "pending", "approved", "rejected"])
+    doctor_labels = repos.doctors.labels()
+    doctor_filter = col_doctor.selectbox("Doctor", ["All", *doctor_labels], format_func=lambda value: doctor_labels.get(value, value))
+    date_range = col_dates.date_input("Date Range", value=[])
+    filters = AppointmentFilter(status_filter, doctor_filter, tuple(date_range))
+
+    # Fetch one page of appointments, newest first
+    cursors = page_cursors(st.session_state, "appointment_pages", filters)
+    appointments, has_more = repos.appointments.page(filters, after=cursors[-1])
+    outbox = get_notification_outbox(repos)
+
+    # Bulk actions on selected appointments of this page or on everything pending that matches the filters
+    st.write("### Bulk Actions")
+    labels = {
+        str(appointment["_id"]): (
+            f"{appointment.get('date', 'N/A')} {appointment.get('appointment_time', 'N/A')} - "
+            f"{appointment.get('doctor', 'N/A')} for {appointment.get('patient_name', 'N/A')} "
+            f"({appointment.get('appointment_status') or 'pending'})"
+        )
+        for appointment in appointments
+    }
+    pending_total = repos.appointments.count_pending(filters)
+    # A form, so picking appointments and the action causes no rerun until a button is pressed
+    with st.form("bulk_actions_form"):
+        selected_ids = st.multiselect("Appointments on this page", list(labels), format_func=labels.get)
+        bulk_action = st.selectbox("Action", ["approve", "reject", "delete"], format_func=str.capitalize)
+        col_selected, col_matching = st.columns(2)
+        apply_selected = col_selected.form_submit_button("Apply to Selected")
+        apply_matching = col_matching.form_submit_button(
+            f"Apply to All {pending_total} Pending Matching the Filters", disabled=not pending_total
+        )
+    changed = None
+    if apply_selected:
+        if selected_ids:
+            chosen = [appointment for appointment in appointments if str(appointment["_id"]) in selected_ids]
+            changed = repos.appointments.apply_action(chosen, bulk_action, outbox)
+        else:
+            st.warning("Select at least one appointment on this page.")
+    if apply_matching:
+        changed = repos.appointments.apply_action(repos.appointments.pending(filters), bulk_action, outbox)
+    if changed is not None:
+        st.success(f"{bulk_action.capitalize()} applied to {len(changed)} appointment(s).")
+        appointments, has_more = repos.appointments.page(filters, after=cursors[-1])
+
+    total = repos.appointments.count(filters)
     if len(appointments) > 0:
-        df_appointments = pd.DataFrame(appointments)
-        df_appointments["_id"] = df_appointments["_id"].astype(str)
-        
-        st.write("### Appointments")
-        for _, appointment in df_appointments.iterrows():
+        st.write(f"### Appointments ({total} total, page {len(cursors)})")
+        for appointment in appointments:
             patient_name = appointment.get("patient_name", "N/A")
             doctor_name = appointment.get("doctor", "N/A")
             appointment_time = appointment.get("appointment_time", "N/A")
-            status = str(appointment.get("appointment_status", "pending"))  # Ensure 'status' is a string
+            status = str(appointment.get("appointment_status") or "pending")  # Ensure 'status' is a string
             
             with st.expander(f"Appointment with {doctor_name} for {patient_name} at {appointment_time}"):
                 st.write(f"**Patient Name:** {patient_name}")
@@ -398,84 +855,233 @@ def render_manage_appointments(db):
                 if status == "pending":
                     # Approve button
                     if col1.button("Approve", key=f"approve_{appointment['_id']}"):
-                        db.appointments.update_one(
-                            {"_id": ObjectId(appointment["_id"])} ,
-                            {"$set": {"appointment_status": "approved"}}
-                        )
-                        send_notification(db, patient_name, f"Your appointment with {doctor_name} at {appointment_time} has been approved.")
+                        repos.appointments.apply_action([appointment], "approve", outbox)
                         st.success("Appointment approved successfully.")
                         st.session_state.page = "Manage Appointments"  # Trigger rerun
 
                     # Reject button
                     if col2.button("Reject", key=f"reject_{appointment['_id']}"):
-                        db.appointments.update_one(
-                            {"_id": ObjectId(appointment["_id"])} ,
-                            {"$set": {"appointment_status": "rejected"}}
-                        )
-                        send_notification(db, patient_name, f"Your appointment with {doctor_name} at {appointment_time} has been rejected.")
+                        repos.appointments.apply_action([appointment], "reject", outbox)
                         st.error("Appointment rejected.")
                         st.session_state.page = "Manage Appointments"  # Trigger rerun
                 
                 # Delete button (Available for all statuses)
                 if col3.button("Delete", key=f"delete_{appointment['_id']}"):
-                    db.appointments.delete_one({"_id": ObjectId(appointment["_id"])})
-                    send_notification(db, patient_name, f"Your appointment with {doctor_name} at {appointment_time} has been deleted by the admin.")
+                    repos.appointments.apply_action([appointment], "delete", outbox)
                     st.warning("Appointment deleted.")
                     st.session_state.page = "Manage Appointments"  # Trigger rerun
+
+        # Page navigation
+        col_previous, col_next = st.columns(2)
+        col_previous.button("Previous Page", disabled=len(cursors) == 1, on_click=cursors.pop)
+        col_next.button("Next Page", disabled=not has_more, on_click=cursors.append, args=(appointments[-1]["_id"],))
     else:
         st.write("No appointments found.")
 
 
+# Admin Dashboard: on MongoDB it reads only the rollup collections, so it costs the
+# same however many appointments there are
+@timed_render
+def render_dashboard(repos):
+    import pandas as pd
+
+    st.title("📈 Dashboard")
+
+    today = datetime.today().date()
+    date_range = st.date_input("Appointment Dates", value=(today - timedelta(days=29), today + timedelta(days=30)))
+    if len(date_range) != 2:
+        st.write("Select a start and end date.")
+        return
+    first_date, last_date = date_range
+
+    days = repos.appointments.specialization_days(first_date, last_date)
+    if not days:
+        st.write("No appointments in this date range.")
+        return
+    by_day = pd.DataFrame(days)
+    totals = by_day[["total", "pending", "approved", "rejected"]].sum()
+    decided = totals["approved"] + totals["rejected"]
+
+    col_total, col_pending, col_approved, col_rejected = st.columns(4)
+    col_total.metric("Appointments", int(totals["total"]))
+    col_pending.metric("Pending", int(totals["pending"]))
+    col_approved.metric("Approval Rate", f"{totals['approved'] / decided:.0%}" if decided else "-")
+    col_rejected.metric("Rejection Rate", f"{totals['rejected'] / decided:.0%}" if decided else "-")
+
+    st.subheader("Appointments per Day")
+    st.bar_chart(by_day.groupby("date")["total"].sum())
+
+    st.subheader("By Specialization")
+    by_specialization = by_day.groupby("specialization")[["total", "pending", "approved", "rejected"]].sum()
+    decided_by_specialization = by_specialization["approved"] + by_specialization["rejected"]
+    by_specialization["approval_rate"] = (
+        by_specialization["approved"] / decided_by_specialization.where(decided_by_specialization > 0)
+    ).round(2)
+    st.dataframe(by_specialization.sort_values("total", ascending=False))
+
+    # Utilization: booked slots over the doctor's slots in the range, for the busiest doctors
+    st.subheader("Busiest Doctors")
+    rows = []
+    for counts in repos.appointments.doctor_totals(first_date, last_date)[:20]:
+        doctor = repos.doctors.get(counts["_id"]) if counts["_id"] else None
+        capacity = slot_count(doctor) * len(working_dates(doctor, first_date, (last_date - first_date).days + 1)) if doctor else 0
+        rows.append({
+            "Doctor": counts["doctor"],
+            "Identity Number": counts["_id"],
+            "Specialization": counts["specialization"],
+            "Appointments": counts["total"],
+            "Approved": counts["approved"],
+            "Rejected": counts["rejected"],
+            "Utilization": f"{counts['total'] / capacity:.0%}" if capacity else "-",
+        })
+    st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+
+# Admin Performance page: MongoDB command and page render latencies of this process
+@timed_render
+def render_performance():
+    import pandas as pd
+
+    st.title("⏱️ Performance")
+    st.caption("Latencies recorded by this app process since it started; percentiles are bucket upper bounds.")
+
+    commands = REGISTRY.summary("mongo_command_duration_ms")
+    documents = REGISTRY.counter_values("mongo_documents_returned")
+    for row in commands:
+        returned = documents.get((("collection", row["collection"]), ("command", row["command"])), 0)
+        row["docs_per_command"] = returned / row["count"]
+    pages = REGISTRY.summary("page_render_ms")
+
+    # Deployment health and this process's connection pools
+    settings = get_mongo_settings()
+    if settings["storage"] == "mongo":
+        st.subheader("MongoDB Connection")
+        health = health_check(connect_to_mongodb().client)
+        if health["ok"]:
+            st.write(f"**{health['topology']}**, ping {health['latency_ms']:.1f} ms")
+            st.dataframe(pd.DataFrame(health["servers"]), hide_index=True)
+        else:
+            st.error(f"MongoDB unreachable after {health['latency_ms']:.0f} ms: {health['error']}")
+        pools = POOL_STATS.snapshot()
+        if pools:
+            st.write(f"Connection pools (max {settings['max_pool_size']} connections per server)")
+            st.dataframe(pd.DataFrame(pools), hide_index=True)
+
+    st.subheader("MongoDB Commands")
+    if commands:
+        st.dataframe(pd.DataFrame(commands), hide_index=True)
+    else:
+        st.write("No commands recorded yet.")
+
+    st.subheader("Page Renders")
+    if pages:
+        st.dataframe(pd.DataFrame(pages), hide_index=True)
+    else:
+        st.write("No page renders recorded yet.")
+
+    series = [("mongo_command_duration_ms", {key: row[key] for key in ("collection", "command", "status")}) for row in commands]
+    series += [("page_render_ms", {"page": row["page"]}) for row in pages]
+    if series:
+        name, labels = st.selectbox(
+            "Latency histogram",
+            series,
+            format_func=lambda item: " / ".join(str(value) for value in item[1].values() if value),
+        )
+        buckets = REGISTRY.bucket_counts(name, labels)
+        st.bar_chart(pd.DataFrame({"bucket (ms)": list(buckets), "count": list(buckets.values())}), x="bucket (ms)", y="count")
+
+    col_export, col_reset = st.columns(2)
+    col_export.download_button("Export (Prometheus format)", REGISTRY.prometheus_text(), file_name="metrics.prom", mime="text/plain")
+    if col_reset.button("Reset Metrics"):
+        REGISTRY.reset()
+        st.rerun()
+
+
+# Unread notification count for the sidebar badge, refreshed at most every 30 seconds
+@st.cache_data(ttl=30)
+def cached_unread_count(_repos, user_id):
+    return _repos.notifications.count_unread(ObjectId(user_id))
+
+
 # Patient Notifications
-def render_notifications(db, user):
+@timed_render
+def render_notifications(repos, user):
     st.title("🔔 Notifications 📲")
-    
+
+    # Notifications already loaded in this session; only newer ones are fetched on reruns
+    feed = st.session_state.get("notification_feed")
+    if feed is None or feed["user_id"] != user["_id"]:
+        notifications = repos.notifications.fetch(user["_id"])
+        feed = {"user_id": user["_id"], "items": notifications, "has_older": len(notifications) == FEED_PAGE_SIZE}
+        st.session_state.notification_feed = feed
+    elif feed["items"]:
+        known_ids = {notification["_id"] for notification in feed["items"]}
+        newer = repos.notifications.fetch(user["_id"], newer_than=feed["items"][0]["timestamp"])
+        feed["items"][:0] = [notification for notification in newer if notification["_id"] not in known_ids]
+    else:
+        feed["items"] = repos.notifications.fetch(user["_id"])
+
+    col_read, col_clear = st.columns(2)
+    if col_read.button("Mark All as Read"):
+        repos.notifications.mark_all_read(user["_id"])
+        for notification in feed["items"]:
+            notification["read"] = True
+        cached_unread_count.clear()
+
     # Button to clear all notifications
-    if st.button("Clear All Notifications"):
-        db.notifications.delete_many({"recipient": user["name"]})
+    if col_clear.button("Clear All Notifications"):
+        repos.notifications.clear(user["_id"])
+        feed["items"] = []
+        feed["has_older"] = False
+        cached_unread_count.clear()
         st.success("All notifications cleared.")
-    
-    # Fetch notifications for the logged-in patient
-    notifications = list(db.notifications.find({"recipient": user["name"]}))
-    
-    if len(notifications) > 0:
-        for notification in notifications:
-            st.info(notification["message"])
+
+    if len(feed["items"]) > 0:
+        for notification in feed["items"]:
+            timestamp = notification["timestamp"].strftime("%Y-%m-%d %H:%M")
+            if notification.get("read"):
+                st.info(f"{notification['message']} ({timestamp})")
+            else:
+                st.warning(f"🆕 {notification['message']} ({timestamp})")
+        if feed["has_older"] and st.button("Load Older Notifications"):
+            older = repos.notifications.fetch(user["_id"], older_than=feed["items"][-1]["timestamp"])
+            feed["items"].extend(older)
+            feed["has_older"] = len(older) == FEED_PAGE_SIZE
+            st.rerun()
     else:
         st.write("No notifications.")
 
 
-# Send Notification Function
-def send_notification(db, recipient_name, message):
-    db.notifications.insert_one({
-        "recipient": recipient_name,
-        "message": message,
-        "timestamp": pd.Timestamp.now()
-    })
-
-# Adjust Navbar for Patients
-def navbar(user_type):
-    st.sidebar.title("Navigation")
-    if user_type == "admin":
-        options = ["Home", "Manage Doctors", "Manage Appointments", "Patient Info"]
-    else:
-        options = ["Home", "Book Appointment", "Notifications", "Chatbot"]
-    choice = st.sidebar.radio("Go to", options)
-    return choice
+# Notification outbox shared by all sessions of this process; writes happen
+# on its background thread so admin actions never wait for them
+@st.cache_resource
+def get_notification_outbox(_repos):
+    return NotificationOutbox([_repos.notifications, LocalPushBackend(os.environ.get("PUSH_OUTBOX_FILE"))])
 
 
-# Navigation Menu
-def navbar(user_type):
+# Navigation Menu; the Notifications entry shows the unread count
+def navbar(user_type, unread=0):
     st.sidebar.title("Navigation")
     if user_type == "admin":
-        options = ["Home", "Manage Doctors", "Manage Appointments", "Patient Info"]
+        options = ["Home", "Dashboard", "Manage Doctors", "Manage Appointments", "Patient Info", "Performance"]
     else:
-        options = ["Home", "Book Appointment", "Notifications", "Chatbot"]
-    return st.sidebar.radio("Go to", options)
+        options = ["Home", "Find a Doctor", "Book Appointment", "My Appointments", "Notifications", "Chatbot"]
+    return st.sidebar.radio(
+        "Go to",
+        options,
+        key="navigation",
+        format_func=lambda option: f"{option} ({unread})" if option == "Notifications" and unread else option,
+    )
 
 
-# Logout function
-def logout():
+# Logout function; releases the patient's slot hold and deletes the admin's exports
+def logout(repos):
+    if st.session_state.user:
+        repos.appointments.release_holds(st.session_state.user["_id"])
+    for key in ("patient_export", "doctor_export"):
+        export = st.session_state.pop(key, None)
+        if export:
+            remove_export(export[0])
     st.session_state.user = None
     st.session_state.page = "Login"
 
@@ -483,10 +1089,8 @@ def logout():
 # Main function
 def main():
     inject_custom_css()
-    db = connect_to_mongodb()
-    initialize_doctors(db)
-    initialize_users(db)
-    update_existing_doctors(db)
+    repos = get_repositories()
+    get_export_sweeper()
 
     # Ensure session state is properly initialized
     if "user" not in st.session_state:
@@ -501,7 +1105,7 @@ def main():
         password = st.text_input("Password", type="password")
         user_type = st.radio("Login as:", ["patient", "admin"])
         if st.button("Login"):
-            user = authenticate_user(db, username, password, user_type)
+            user = authenticate_user(repos.users, username, password, user_type)
             if user:
                 st.session_state.user = user
                 st.session_state.page = "Home"
@@ -521,7 +1125,7 @@ def main():
         
         if st.button("Sign Up"):
             if name and username and password:
-                success = register_user(db, username, password, name, age, phone, email)
+                success = register_user(repos.users, username, password, name, age, phone, email)
                 if success:
                     st.success("Account created successfully! Please log in.")
                     st.session_state.page = "Login"
@@ -532,26 +1136,35 @@ def main():
 
     else:
         user = st.session_state.user
-        page = navbar(user["type"])
+        unread = cached_unread_count(repos, str(user["_id"])) if user["type"] == "patient" else 0
+        page = navbar(user["type"], unread)
 
         if page == "Home":
             render_home()
+        elif page == "Dashboard" and user["type"] == "admin":
+            render_dashboard(repos)
         elif page == "Patient Info" and user["type"] == "admin":
-            render_patient_info(db)
+            render_patient_info(repos)
+        elif page == "Find a Doctor" and user["type"] == "patient":
+            render_find_doctor(repos)
         elif page == "Book Appointment" and user["type"] == "patient":
-            render_book_appointment(db, user)
+            render_book_appointment(repos, user)
+        elif page == "My Appointments" and user["type"] == "patient":
+            render_my_appointments(repos, user)
         elif page == "Notifications" and user["type"] == "patient":
-            render_notifications(db, user)
+            render_notifications(repos, user)
         elif page == "Chatbot" and user["type"] == "patient":
-            render_chatbot()
+            render_chatbot(repos)
         elif page == "Manage Doctors" and user["type"] == "admin":
-            render_manage_doctors(db)
+            render_manage_doctors(repos)
         elif page == "Manage Appointments" and user["type"] == "admin":
-            render_manage_appointments(db)
+            render_manage_appointments(repos)
+        elif page == "Performance" and user["type"] == "admin":
+            render_performance()
 
         # Logout button
         if st.sidebar.button("Logout"):
-            logout()
+            logout(repos)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,475 @@
+import math
+import threading
+from collections import Counter
+from datetime import date as date_type
+
+from bson.objectid import ObjectId
+
+from appointment_actions import ACTION_FIELDS, ACTIONS, is_pending, notify_patients
+from booking import MY_APPOINTMENTS_LIMIT, SlotTakenError, appointment_document
+from doctor_io import diff_import, doctor_export_row, empty_import_summary
+from doctor_search import FACET_FIELDS, NEAREST_COUNT, SEARCH_PAGE_SIZE
+from geocoding import geocode_pincode
+from notifications import CLOCK_SKEW, FEED_PAGE_SIZE
+from pagination import PAGE_SIZE
+from repositories import APPOINTMENT_LIST_FIELDS, PATIENT_LIST_FIELDS, Repositories, SlotQueries
+from rollups import STATUSES, UNKNOWN_SPECIALIZATION, appointment_status
+from slot_holds import HOLD_DURATION, utc_now
+from slots import merge_labels
+
+# In-memory repositories with the methods of the MongoDB ones in repositories.py, kept
+# in dicts with the lookups the pages need indexed. Data lives as long as the process;
+# each repository serializes its writes with a lock.
+EARTH_RADIUS_M = 6_378_100  # The radius $geoNear uses for spherical distances
+
+
+def _project(document, fields):
+    return {"_id": document["_id"], **{field: document[field] for field in fields if field in document}}
+
+
+# Great-circle distance in metres between two (longitude, latitude) points
+def _distance_m(a, b):
+    lon1, lat1, lon2, lat2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+# Doctors by identity number, with a per-specialization index
+class InMemoryDoctorRepo:
+    def __init__(self, appointments, doctors=()):
+        self.appointments = appointments  # For the next free slots in search results
+        self._doctors = {}
+        self._by_specialization = {}
+        self._lock = threading.Lock()
+        # Like seeding.seed_doctors ($setOnInsert), the first record of a duplicated
+        # identity number wins
+        for doctor in doctors:
+            if doctor.doctor_identity_number not in self._doctors:
+                self._store(doctor)
+
+    def _store(self, doctor):
+        self._remove(doctor.doctor_identity_number)
+        self._doctors[doctor.doctor_identity_number] = doctor
+        self._by_specialization.setdefault(doctor.specialization, {})[doctor.doctor_identity_number] = doctor
+
+    def _remove(self, doctor_identity_number):
+        doctor = self._doctors.pop(doctor_identity_number, None)
+        if doctor is not None:
+            specialists = self._by_specialization[doctor.specialization]
+            del specialists[doctor_identity_number]
+            if not specialists:
+                del self._by_specialization[doctor.specialization]
+        return doctor
+
+    def get(self, doctor_identity_number):
+        return self._doctors.get(doctor_identity_number)
+
+    def by_specialization(self, specialization):
+        with self._lock:
+            return tuple(self._by_specialization.get(specialization, {}).values())
+
+    def specializations(self):
+        with self._lock:
+            return sorted(self._by_specialization)
+
+    def labels(self):
+        with self._lock:
+            doctors = sorted(self._doctors.values(), key=lambda doctor: doctor.name)
+        return {doctor.doctor_identity_number: f"{doctor.name} ({doctor.doctor_identity_number})" for doctor in doctors}
+
+    def all_documents(self):
+        return tuple(doctor.to_document() for doctor in sorted(self.all(), key=lambda doctor: doctor.doctor_identity_number))
+
+    def all(self):
+        with self._lock:
+            return list(self._doctors.values())
+
+    def add(self, doctor):
+        with self._lock:
+            self._store(doctor)
+
+    def delete(self, doctor_identity_number):
+        with self._lock:
+            return self._remove(doctor_identity_number)
+
+    # Same result as doctor_search.search_doctors, computed over the stored doctors
+    def search(self, selected, min_rating=0.0, sort="rating", page=0, page_size=SEARCH_PAGE_SIZE, today=None):
+        chosen = {facet: set(values) for facet, values in selected.items() if values}
+
+        def matches(doctor, skip=None):
+            return all(getattr(doctor, FACET_FIELDS[facet]) in values for facet, values in chosen.items() if facet != skip)
+
+        doctors = sorted(
+            (doctor for doctor in self.all() if doctor.rating >= min_rating),
+            key=lambda doctor: (-doctor.rating, doctor.doctor_identity_number),
+        )
+        results = [doctor for doctor in doctors if matches(doctor)]
+        facets = {}
+        for facet, field in FACET_FIELDS.items():
+            counts = Counter(getattr(doctor, field) for doctor in doctors if matches(doctor, skip=facet))
+            facets[facet] = [(value, count) for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])) if value]
+
+        if sort == "next_free_slot":
+            next_slots = self.appointments.first_free_slots(results, today)
+            results.sort(key=lambda doctor: next_slots.get(doctor.doctor_identity_number) or (date_type.max, ""))
+            shown = results[page * page_size:(page + 1) * page_size]
+        else:
+            shown = results[page * page_size:(page + 1) * page_size]
+            next_slots = self.appointments.first_free_slots(shown, today)
+        return {
+            "doctors": [(doctor, next_slots.get(doctor.doctor_identity_number)) for doctor in shown],
+            "total": len(results),
+            "facets": facets,
+        }
+
+    def nearest(self, pincode, specialization=None, n=NEAREST_COUNT):
+        coordinates = geocode_pincode(pincode)
+        if coordinates is None:
+            raise ValueError(f"Unknown PIN code '{pincode}'")
+        candidates = self.by_specialization(specialization) if specialization else self.all()
+        distances = sorted(
+            (_distance_m(coordinates, doctor.coordinates), doctor.doctor_identity_number, doctor)
+            for doctor in candidates
+            if doctor.coordinates
+        )
+        return [(doctor, distance / 1000) for distance, _, doctor in distances[:n]]
+
+    def import_rows(self, rows, dry_run=True):
+        def existing_documents(identity_numbers):
+            return {number: self._doctors[number].to_document() for number in identity_numbers if number in self._doctors}
+
+        summary = empty_import_summary()
+        for changed in diff_import(rows, existing_documents, summary):
+            if not dry_run:
+                with self._lock:
+                    for doctor in changed:
+                        self._store(doctor)
+        return summary
+
+    def export_rows(self):
+        return (doctor_export_row(document) for document in self.all_documents())
+
+    def cache_stats(self):
+        return None  # Nothing to cache in memory
+
+
+# Users by _id, indexed by username
+class InMemoryUserRepo:
+    def __init__(self, users=()):
+        self._users = {}
+        self._by_username = {}
+        self._lock = threading.Lock()
+        for user in users:
+            if user["username"] not in self._by_username:  # First one wins, as in seeding.seed_users
+                self._store(dict(user))
+
+    def _store(self, user):
+        user.setdefault("_id", ObjectId())
+        self._users[user["_id"]] = user
+        self._by_username[user["username"]] = user
+
+    def authenticate(self, username, password_hash, user_type):
+        user = self._by_username.get(username)
+        if user is None or user.get("password") != password_hash or user.get("type") != user_type:
+            return None
+        return dict(user)
+
+    def register(self, user):
+        with self._lock:
+            if user["username"] in self._by_username:
+                return False
+            self._store(dict(user))
+            return True
+
+    # Patients matching the search, newest first, like repositories.patient_query
+    def _patients(self, search):
+        search = search.lower()
+        with self._lock:
+            users = sorted(self._users.values(), key=lambda user: user["_id"], reverse=True)
+        return [
+            user for user in users
+            if user.get("type") == "patient"
+            and (not search or any(str(user.get(field, "")).lower().startswith(search) for field in ("name", "username", "phone")))
+        ]
+
+    def patients_page(self, search, after=None, page_size=PAGE_SIZE):
+        patients = [user for user in self._patients(search) if after is None or user["_id"] < after]
+        return [_project(user, PATIENT_LIST_FIELDS) for user in patients[:page_size]], len(patients) > page_size
+
+    def count_patients(self, search):
+        return len(self._patients(search))
+
+    def all_patients(self):
+        return (_project(user, PATIENT_LIST_FIELDS) for user in reversed(self._patients("")))
+
+    # {name: user _id} of the first patient with each name
+    def patient_ids(self, names):
+        with self._lock:
+            ids = {}
+            for user in self._users.values():
+                if user.get("type") == "patient" and user.get("name") in names:
+                    ids.setdefault(user["name"], user["_id"])
+            return ids
+
+
+# Appointments in _id order, with the booked slots indexed by (doctor, date) (which
+# also enforces one booking per slot, like the doctor_slot_unique index) and by patient.
+# Slot holds are indexed the same way; expired ones are ignored and replaced when
+# someone holds the slot or their holder holds another.
+class InMemoryAppointmentRepo(SlotQueries):
+    def __init__(self, users, appointments=()):
+        self.users = users  # To notify patients of appointments stored without patient_id
+        self._appointments = {}
+        self._slots = {}  # (doctor_identity_number, iso date) -> {"HH:MM": _id}
+        self._by_patient = {}  # patient_id -> {_id}
+        self._holds = {}  # (doctor_identity_number, iso date) -> {"HH:MM": (holder_id, expires_at)}
+        self._held_by = {}  # holder_id -> ((doctor_identity_number, iso date), "HH:MM") of their one hold
+        self._lock = threading.Lock()
+        for appointment in sorted(appointments, key=lambda appointment: appointment["_id"]):
+            self._store(dict(appointment))
+
+    def _store(self, appointment):
+        self._appointments[appointment["_id"]] = appointment
+        if appointment.get("doctor_identity_number"):
+            key = (appointment["doctor_identity_number"], appointment["date"])
+            self._slots.setdefault(key, {})[appointment["appointment_time"]] = appointment["_id"]
+        if appointment.get("patient_id"):
+            self._by_patient.setdefault(appointment["patient_id"], set()).add(appointment["_id"])
+
+    def _remove(self, appointment_id):
+        appointment = self._appointments.pop(appointment_id)
+        if appointment.get("doctor_identity_number"):
+            self._slots[(appointment["doctor_identity_number"], appointment["date"])].pop(appointment["appointment_time"], None)
+        if appointment.get("patient_id"):
+            self._by_patient[appointment["patient_id"]].discard(appointment_id)
+
+    def _held_by_other(self, key, appointment_time, holder_id, now):
+        holder, expires_at = self._holds.get(key, {}).get(appointment_time, (holder_id, None))
+        return holder != holder_id and expires_at > now
+
+    def _release(self, holder_id):
+        key, appointment_time = self._held_by.pop(holder_id, (None, None))
+        holds = self._holds.get(key, {})
+        if holds.get(appointment_time, (None,))[0] == holder_id:
+            del holds[appointment_time]
+            if not holds:
+                del self._holds[key]
+
+    def booked_labels(self, doctors, first_date, last_date):
+        first, last = first_date.isoformat(), last_date.isoformat()
+        doctor_ids = {doctor.doctor_identity_number for doctor in doctors}
+        with self._lock:
+            return {
+                key: list(times)
+                for key, times in self._slots.items()
+                if key[0] in doctor_ids and first <= key[1] <= last and times
+            }
+
+    def held_labels(self, doctors, first_date, last_date, holder_id=None):
+        first, last = first_date.isoformat(), last_date.isoformat()
+        doctor_ids = {doctor.doctor_identity_number for doctor in doctors}
+        now = utc_now()
+        held = {}
+        with self._lock:
+            for key, holds in self._holds.items():
+                if key[0] in doctor_ids and first <= key[1] <= last:
+                    labels = [label for label, (holder, expires_at) in holds.items() if expires_at > now and holder != holder_id]
+                    if labels:
+                        held[key] = labels
+        return held
+
+    # Booked slots plus those held by patients other than holder_id, for SlotQueries
+    def taken(self, holder_id=None):
+        return lambda doctors, first_date, last_date: merge_labels(
+            self.booked_labels(doctors, first_date, last_date), self.held_labels(doctors, first_date, last_date, holder_id)
+        )
+
+    def hold(self, doctor, day, appointment_time, patient_id):
+        key = (doctor.doctor_identity_number, day.isoformat())
+        now = utc_now()
+        with self._lock:
+            taken = appointment_time in self._slots.get(key, {})
+            if not taken:
+                self._release(patient_id)
+                taken = self._held_by_other(key, appointment_time, patient_id, now)
+            if not taken:
+                expires_at = now + HOLD_DURATION
+                self._holds.setdefault(key, {})[appointment_time] = (patient_id, expires_at)
+                self._held_by[patient_id] = (key, appointment_time)
+        if taken:
+            raise SlotTakenError(self.next_free_slots([doctor], n=5, today=day, holder_id=patient_id))
+        return expires_at
+
+    def release_holds(self, patient_id):
+        with self._lock:
+            self._release(patient_id)
+
+    def book(self, doctor, day, appointment_time, patient_id, patient_name, age, symptoms):
+        appointment = appointment_document(doctor, day, appointment_time, patient_id, patient_name, age, symptoms)
+        key = (doctor.doctor_identity_number, appointment["date"])
+        with self._lock:
+            taken = appointment_time in self._slots.get(key, {}) or self._held_by_other(key, appointment_time, patient_id, utc_now())
+            if not taken:
+                appointment["_id"] = ObjectId()
+                self._store(appointment)
+                if self._held_by.get(patient_id) == (key, appointment_time):
+                    self._release(patient_id)
+        if taken:
+            raise SlotTakenError(self.next_free_slots([doctor], n=5, today=day, holder_id=patient_id))
+        return appointment["_id"]
+
+    def for_patient(self, patient_id, today, upcoming=True, limit=MY_APPOINTMENTS_LIMIT):
+        with self._lock:
+            appointments = [self._appointments[appointment_id] for appointment_id in self._by_patient.get(patient_id, ())]
+        today = today.isoformat()
+        appointments = [
+            appointment for appointment in appointments if (appointment["date"] >= today) == upcoming
+        ]
+        appointments.sort(key=lambda appointment: (appointment["date"], appointment["appointment_time"]), reverse=not upcoming)
+        fields = ["date", "appointment_time", "doctor", "specialization", "appointment_status"]
+        return [{field: appointment[field] for field in fields if field in appointment} for appointment in appointments[:limit]]
+
+    def _matching(self, filters):
+        first, last = (day.isoformat() for day in filters.date_range) if len(filters.date_range) == 2 else (None, None)
+        with self._lock:
+            appointments = list(self._appointments.values())
+        for appointment in reversed(appointments):
+            if filters.status == "pending" and not is_pending(appointment):
+                continue
+            if filters.status not in ("All", "pending") and appointment.get("appointment_status") != filters.status:
+                continue
+            if filters.doctor_id != "All" and appointment.get("doctor_identity_number") != filters.doctor_id:
+                continue
+            if first is not None and not (appointment.get("date") and first <= appointment["date"] <= last):
+                continue
+            yield appointment
+
+    def page(self, filters, after=None, page_size=PAGE_SIZE):
+        page = []
+        for appointment in self._matching(filters):
+            if after is not None and appointment["_id"] >= after:
+                continue
+            page.append(_project(appointment, APPOINTMENT_LIST_FIELDS))
+            if len(page) > page_size:
+                break
+        return page[:page_size], len(page) > page_size
+
+    def count(self, filters):
+        return sum(1 for _ in self._matching(filters))
+
+    def count_pending(self, filters):
+        return self.count(filters._replace(status="pending"))
+
+    def pending(self, filters):
+        return [_project(appointment, ACTION_FIELDS) for appointment in self._matching(filters._replace(status="pending"))]
+
+    def apply_action(self, appointments, action, outbox):
+        status, wording = ACTIONS[action]
+        changed = []
+        with self._lock:
+            for appointment in appointments:
+                stored = self._appointments.get(appointment["_id"])
+                if stored is None or (status is not None and not is_pending(stored)):
+                    continue
+                if status is None:
+                    self._remove(stored["_id"])
+                else:
+                    stored["appointment_status"] = status
+                changed.append(appointment)
+        ids_by_name = self.users.patient_ids(
+            {appointment.get("patient_name") for appointment in changed if not appointment.get("patient_id")}
+        )
+        recipient_ids = [
+            appointment.get("patient_id") or ids_by_name.get(appointment.get("patient_name")) for appointment in changed
+        ]
+        notify_patients(outbox, changed, recipient_ids, wording)
+        return changed
+
+    def _in_range(self, first_date, last_date):
+        first, last = first_date.isoformat(), last_date.isoformat()
+        with self._lock:
+            return [appointment for appointment in self._appointments.values() if first <= appointment.get("date", "") <= last]
+
+    # The rows rollups.specialization_days reads, counted on the fly
+    def specialization_days(self, first_date, last_date):
+        days = {}
+        for appointment in self._in_range(first_date, last_date):
+            specialization = appointment.get("specialization") or UNKNOWN_SPECIALIZATION
+            row = days.setdefault(
+                (specialization, appointment["date"]),
+                {"specialization": specialization, "date": appointment["date"], "total": 0, **dict.fromkeys(STATUSES, 0)},
+            )
+            row["total"] += 1
+            row[appointment_status(appointment)] += 1
+        return list(days.values())
+
+    # The rows rollups.doctor_totals returns, counted on the fly
+    def doctor_totals(self, first_date, last_date):
+        totals = {}
+        for appointment in self._in_range(first_date, last_date):
+            row = totals.setdefault(appointment.get("doctor_identity_number"), {
+                "_id": appointment.get("doctor_identity_number"),
+                "doctor": appointment.get("doctor"),
+                "specialization": appointment.get("specialization") or UNKNOWN_SPECIALIZATION,
+                "total": 0,
+                **dict.fromkeys(STATUSES, 0),
+            })
+            row["total"] += 1
+            row[appointment_status(appointment)] += 1
+        return sorted(totals.values(), key=lambda row: -row["total"])
+
+
+# Notifications grouped by recipient
+class InMemoryNotificationRepo:
+    name = "memory"
+
+    def __init__(self, notifications=()):
+        self._by_recipient = {}  # recipient_id -> {_id: notification}
+        self._lock = threading.Lock()
+        self.deliver(notifications)
+
+    # Notifications carry their _id, so redelivered ones replace themselves
+    def deliver(self, notifications):
+        with self._lock:
+            for notification in notifications:
+                self._by_recipient.setdefault(notification.get("recipient_id"), {})[notification["_id"]] = dict(notification)
+
+    def _of(self, recipient_id):
+        with self._lock:
+            return list(self._by_recipient.get(recipient_id, {}).values())
+
+    def fetch(self, recipient_id, newer_than=None, older_than=None, limit=FEED_PAGE_SIZE):
+        notifications = self._of(recipient_id)
+        if newer_than is not None:
+            notifications = [item for item in notifications if item["timestamp"] >= newer_than - CLOCK_SKEW]
+            limit = 0
+        elif older_than is not None:
+            notifications = [item for item in notifications if item["timestamp"] < older_than]
+        notifications.sort(key=lambda item: item["timestamp"], reverse=True)
+        if limit:
+            notifications = notifications[:limit]
+        return [_project(item, ["message", "read", "timestamp"]) for item in notifications]
+
+    def count_unread(self, recipient_id):
+        return sum(1 for item in self._of(recipient_id) if not item.get("read"))
+
+    def mark_all_read(self, recipient_id):
+        with self._lock:
+            for item in self._by_recipient.get(recipient_id, {}).values():
+                item["read"] = True
+
+    def clear(self, recipient_id):
+        with self._lock:
+            self._by_recipient.pop(recipient_id, None)
+
+
+# Repositories holding the given Doctor records and user, appointment and notification documents
+def memory_repositories(doctors=(), users=(), appointments=(), notifications=()):
+    user_repo = InMemoryUserRepo(users)
+    appointment_repo = InMemoryAppointmentRepo(user_repo, appointments)
+    return Repositories(
+        doctors=InMemoryDoctorRepo(appointment_repo, doctors),
+        users=user_repo,
+        appointments=appointment_repo,
+        notifications=InMemoryNotificationRepo(notifications),
+    )
@@ -0,0 +1,176 @@
+import functools
+import threading
+import time
+
+from pymongo import monitoring
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is unbounded)
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf"))
+
+
+# Fixed-bucket latency histogram; cheap enough to update on every command
+class Histogram:
+    __slots__ = ("counts", "count", "total", "maximum")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    # Upper bound of the bucket holding the given quantile
+    def quantile(self, fraction):
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(bound, self.maximum)
+        return self.maximum
+
+
+# Process-wide histograms keyed by metric name and label values, plus plain counters
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> number
+        self._lock = threading.Lock()
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    # Rows of {"metric", labels..., "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"} for one metric
+    def summary(self, name):
+        with self._lock:
+            items = [(labels, histogram) for (metric, labels), histogram in self._histograms.items() if metric == name]
+            rows = []
+            for labels, histogram in items:
+                rows.append({
+                    **dict(labels),
+                    "count": histogram.count,
+                    "mean_ms": histogram.total / histogram.count,
+                    "p50_ms": histogram.quantile(0.50),
+                    "p95_ms": histogram.quantile(0.95),
+                    "p99_ms": histogram.quantile(0.99),
+                    "max_ms": histogram.maximum,
+                })
+        return sorted(rows, key=lambda row: -row["count"] * row["mean_ms"])
+
+    # Per-bucket counts of one series, keyed by the bucket's upper bound label
+    def bucket_counts(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            counts = list(histogram.counts) if histogram else [0] * len(BUCKETS_MS)
+        return {("> 5000" if bound == float("inf") else f"<= {bound:g}"): count for bound, count in zip(BUCKETS_MS, counts)}
+
+    def counter_values(self, name):
+        with self._lock:
+            return {labels: value for (metric, labels), value in self._counters.items() if metric == name}
+
+    # Prometheus text exposition format
+    def prometheus_text(self):
+        def format_labels(labels, extra=()):
+            pairs = [
+                f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+                for key, value in (*labels, *extra)
+            ]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        lines = []
+        with self._lock:
+            for name in sorted({metric for metric, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), histogram in self._histograms.items():
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS_MS, histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{format_labels(labels, [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram.total:.3f}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+            for name in sorted({metric for metric, _ in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in self._counters.items():
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _documents_returned(reply):
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+    if "values" in reply:  # distinct
+        return len(reply["values"])
+    return 0
+
+
+# Records latency, collection and documents returned for every MongoDB command
+class CommandMetricsListener(monitoring.CommandListener):
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self._collections = {}  # (connection, request id) -> collection name
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def succeeded(self, event):
+        self._record(event, "ok", _documents_returned(event.reply))
+
+    def failed(self, event):
+        self._record(event, "failed", 0)
+
+    def _record(self, event, status, documents):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        labels = {"command": event.command_name, "collection": collection, "status": status}
+        self.registry.observe("mongo_command_duration_ms", labels, event.duration_micros / 1000)
+        if documents:
+            self.registry.increment("mongo_documents_returned", {"command": event.command_name, "collection": collection}, documents)
+
+
+# Decorator timing a page render function per call
+def timed_render(function, registry=REGISTRY):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            registry.observe("page_render_ms", {"page": function.__name__}, (time.perf_counter() - start) * 1000)
+
+    return wrapper
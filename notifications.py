@@ -0,0 +1,196 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import DESCENDING, UpdateMany
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+RETENTION_DAYS = 90  # Enforced by the TTL index on notifications.timestamp
+FEED_PAGE_SIZE = 50
+CLOCK_SKEW = timedelta(seconds=5)  # Overlap for incremental fetches across app processes
+RECIPIENT_IDS_MARKER = "recipient_ids_assigned"  # db.meta _id set once assign_recipient_ids has run
+
+
+# Stores notifications in the notifications collection read by the Notifications page
+class MongoNotificationBackend:
+    name = "mongo"
+
+    def __init__(self, db):
+        self.db = db
+
+    def deliver(self, notifications):
+        try:
+            self.db.notifications.insert_many(notifications, ordered=False)
+        except BulkWriteError as error:
+            # Notifications carry their _id, so duplicates on retry were already stored
+            if any(write_error["code"] != DUPLICATE_KEY for write_error in error.details["writeErrors"]):
+                raise
+
+
+# Local stand-in for the Firebase push service: logs each push and optionally
+# appends it to a JSON-lines file
+class LocalPushBackend:
+    name = "push"
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def deliver(self, notifications):
+        for notification in notifications:
+            logger.info("Push to %s: %s", notification["recipient"], notification["message"])
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as output:
+                for notification in notifications:
+                    output.write(json.dumps(notification, default=str) + "\n")
+
+
+# In-process outbox: callers enqueue and return immediately, a background thread
+# delivers batches to every backend and retries failed batches with backoff
+class NotificationOutbox:
+    def __init__(self, backends, batch_size=100, flush_interval=0.5, max_retries=5, retry_delay=0.5):
+        self.backends = list(backends)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.delivered = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def enqueue(self, recipient_id, recipient, message):
+        self.enqueue_many([(recipient_id, recipient, message)])
+
+    # Queue (recipient user _id, recipient name, message) triples; never blocks on delivery
+    def enqueue_many(self, items):
+        for recipient_id, recipient, message in items:
+            self._queue.put({
+                "_id": ObjectId(),
+                "recipient_id": recipient_id,
+                "recipient": recipient,
+                "message": message,
+                "read": False,
+                "timestamp": datetime.now(),
+            })
+
+    def pending(self):
+        return self._queue.qsize()
+
+    # Block until everything queued so far has been handled (delivered or given up on)
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if not self._stopped.is_set():
+            self._stopped.set()
+            self._worker.join()
+
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            if all([self._deliver(backend, batch) for backend in self.backends]):
+                self.delivered += len(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _deliver(self, backend, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                backend.deliver(batch)
+                return True
+            except Exception:
+                if attempt == self.max_retries:
+                    logger.exception("Giving up on %d notifications for the %s backend", len(batch), backend.name)
+                    self.failed += len(batch)
+                    return False
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+
+# User _id of each appointment's patient; appointments booked before patient_id was
+# stored fall back to a patient with the same name, resolved in one users query
+def appointment_recipient_ids(db, appointments):
+    names = {appointment.get("patient_name") for appointment in appointments if not appointment.get("patient_id")}
+    ids_by_name = {}
+    if names:
+        for user in db.users.find({"name": {"$in": list(names)}, "type": "patient"}, {"_id": 1, "name": 1}):
+            ids_by_name.setdefault(user["name"], user["_id"])
+    return [
+        appointment.get("patient_id") or ids_by_name.get(appointment.get("patient_name"))
+        for appointment in appointments
+    ]
+
+
+# Notifications for a user, newest first: the latest page, everything newer than
+# `newer_than` (incremental refresh) or the page before `older_than`
+def fetch_notifications(db, recipient_id, newer_than=None, older_than=None, limit=FEED_PAGE_SIZE):
+    query = {"recipient_id": recipient_id}
+    if newer_than is not None:
+        query["timestamp"] = {"$gte": newer_than - CLOCK_SKEW}
+        limit = 0
+    elif older_than is not None:
+        query["timestamp"] = {"$lt": older_than}
+    projection = {"message": 1, "read": 1, "timestamp": 1}
+    return list(db.notifications.find(query, projection).sort("timestamp", DESCENDING).limit(limit))
+
+
+def count_unread(db, recipient_id):
+    return db.notifications.count_documents({"recipient_id": recipient_id, "read": False})
+
+
+def mark_all_read(db, recipient_id):
+    db.notifications.update_many({"recipient_id": recipient_id, "read": False}, {"$set": {"read": True}})
+
+
+def clear_notifications(db, recipient_id):
+    db.notifications.delete_many({"recipient_id": recipient_id})
+
+
+# Attach recipient_id/read to notifications stored when they were keyed by display
+# name, resolving each batch of names with one users query; names matching no user or
+# several are left alone and expire with retention. New notifications always carry
+# recipient_id, so this runs once per database: the meta marker skips it afterwards.
+def assign_recipient_ids(db, batch_size=500):
+    if db.meta.find_one({"_id": RECIPIENT_IDS_MARKER}):
+        return False
+    names = db.notifications.distinct("recipient", {"recipient_id": {"$exists": False}})
+    for start in range(0, len(names), batch_size):
+        ids_by_name = {}
+        for user in db.users.find({"name": {"$in": names[start:start + batch_size]}}, {"_id": 1, "name": 1}):
+            ids_by_name.setdefault(user["name"], []).append(user["_id"])
+        operations = [
+            UpdateMany(
+                {"recipient": name, "recipient_id": {"$exists": False}},
+                {"$set": {"recipient_id": ids[0], "read": False}},
+            )
+            for name, ids in ids_by_name.items()
+            if len(ids) == 1
+        ]
+        if operations:
+            db.notifications.bulk_write(operations, ordered=False)
+    db.meta.update_one({"_id": RECIPIENT_IDS_MARKER}, {"$set": {"done": True}}, upsert=True)
+    return True
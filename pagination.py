@@ -0,0 +1,29 @@
+PAGE_SIZE = 20
+
+
+# One keyset page of documents, newest first: everything after the `after` _id.
+# Returns (documents, has_more); cost depends on the page size, not the collection size.
+def fetch_page(collection, query, projection=None, page_size=PAGE_SIZE, after=None):
+    if after is not None:
+        query = {"$and": [query, {"_id": {"$lt": after}}]}
+    cursor = collection.find(query, projection).sort("_id", -1).limit(page_size + 1)
+    documents = list(cursor)
+    return documents[:page_size], len(documents) > page_size
+
+
+# Number of matching documents; uses collection metadata when there is no filter
+def count_matching(collection, query):
+    if not query:
+        return collection.estimated_document_count()
+    result = list(collection.aggregate([{"$match": query}, {"$count": "total"}]))
+    return result[0]["total"] if result else 0
+
+
+# Keyset cursors for the pages seen so far, kept in st.session_state under `key`
+# and reset whenever the filters change
+def page_cursors(session_state, key, filters):
+    state = session_state.get(key)
+    if state is None or state["filters"] != filters:
+        state = {"filters": filters, "cursors": [None]}
+        session_state[key] = state
+    return state["cursors"]
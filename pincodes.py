@@ -0,0 +1,50 @@
+# Offline PIN code coordinates for Karnataka as (longitude, latitude), the GeoJSON order.
+# PINCODES has the exact locality of every PIN code in the bundled roster; any other
+# PIN code falls back to its sorting district (first three digits) in PIN_PREFIXES.
+
+PINCODES = {
+    "560001": (77.6033, 12.9766),  # Bengaluru GPO, Infantry Road
+    "560002": (77.5773, 12.9634),  # K.R. Market, Bengaluru
+    "560017": (77.6478, 12.9592),  # HAL Old Airport Road, Bengaluru
+    "560034": (77.6229, 12.9279),  # Koramangala, Sarjapur Road, Bengaluru
+    "560060": (77.4826, 12.9081),  # Kengeri, Bengaluru
+    "560099": (77.6929, 12.8105),  # Bommasandra, Bengaluru
+    "570004": (76.6551, 12.3089),  # MG Road, Mysuru
+    "570023": (76.6198, 12.2893),  # Kuvempunagar, Mysuru
+    "571448": (76.7771, 12.8118),  # B.G. Nagara, Mandya
+    "575001": (74.8430, 12.8703),  # Mangaluru
+    "575002": (74.8630, 12.8736),  # Kankanady, Mangaluru
+    "576104": (74.7856, 13.3525),  # Manipal
+    "577002": (75.9218, 14.4644),  # Davangere
+    "577005": (75.9338, 14.4410),  # Davangere
+    "577201": (75.5681, 13.9299),  # Shivamogga
+    "577204": (75.5627, 13.9448),  # Vinoba Nagar, Shivamogga
+    "580009": (75.0078, 15.4589),  # Dharwad
+    "580022": (75.1389, 15.3520),  # Hubballi
+    "590010": (74.5181, 15.8723),  # Nehru Nagar, Belagavi
+}
+
+PIN_PREFIXES = {
+    "560": (77.5946, 12.9716),  # Bengaluru
+    "561": (77.7275, 13.4355),  # Chikkaballapur
+    "562": (77.2826, 12.7209),  # Ramanagara / Bengaluru Rural
+    "563": (78.1292, 13.1362),  # Kolar
+    "570": (76.6394, 12.2958),  # Mysuru
+    "571": (76.8970, 12.5218),  # Mandya / Mysuru district
+    "572": (77.1010, 13.3379),  # Tumakuru
+    "573": (76.0996, 13.0072),  # Hassan
+    "574": (75.0000, 12.9000),  # Dakshina Kannada
+    "575": (74.8560, 12.9141),  # Mangaluru
+    "576": (74.7421, 13.3409),  # Udupi
+    "577": (75.5681, 13.9299),  # Shivamogga / Davangere / Chikkamagaluru
+    "580": (75.1240, 15.3647),  # Hubballi-Dharwad
+    "581": (74.1240, 14.8136),  # Uttara Kannada / Haveri
+    "582": (75.6290, 15.4315),  # Gadag
+    "583": (76.9214, 15.1394),  # Ballari
+    "584": (77.3566, 16.2120),  # Raichur
+    "585": (76.8343, 17.3297),  # Kalaburagi / Bidar
+    "586": (75.7100, 16.8302),  # Vijayapura
+    "587": (75.6961, 16.1691),  # Bagalkot
+    "590": (74.4977, 15.8497),  # Belagavi
+    "591": (74.8000, 16.0000),  # Belagavi district
+}
@@ -0,0 +1,80 @@
+import argparse
+import subprocess
+import sys
+
+# Cold-start report for a fresh app worker: the import-time breakdown of main5 from
+# `python -X importtime` plus the startup work done before the first page renders,
+# each measured in a new interpreter.
+#   python profile_startup.py --top 15
+
+STARTUP_STEPS = {
+    "load_doctors (snapshot)": "from doctor_records import load_doctors; {start}; load_doctors()",
+    "load_doctors (doctors_data.py)": (
+        "import doctor_records; doctor_records.read_roster_snapshot = lambda: None;"
+        " {start}; doctor_records.load_doctors()"
+    ),
+    "seed_hash": (
+        "from doctor_records import load_doctors; from main5 import default_users; from seeding import seed_hash;"
+        " doctors = load_doctors(); users = default_users(); {start}; seed_hash(doctors, users)"
+    ),
+    "import pandas (first table page)": "import main5; {start}; import pandas",
+    "import numpy (first Chatbot search)": "import main5; {start}; import recommender",
+}
+
+
+# [(depth, self us, cumulative us, module)] from the -X importtime lines on stderr
+def import_times(module):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def time_step(code):
+    timed = code.format(start="import time; _start = time.perf_counter()")
+    timed += "; print((time.perf_counter() - _start) * 1000)"
+    completed = subprocess.run([sys.executable, "-c", timed], capture_output=True, text=True, check=True)
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def report(module, top):
+    rows = import_times(module)
+    total = next(cumulative for depth, _, cumulative, name in rows if depth == 0 and name == module)
+    # Direct imports of the module, grouped by top-level package
+    top_level = {}
+    for depth, _, cumulative, name in rows:
+        if depth == 1:
+            package = name.split(".")[0]
+            top_level[package] = top_level.get(package, 0) + cumulative
+
+    print(f"import {module}: {total / 1000:.1f} ms")
+    print("\nTop-level packages by cumulative import time")
+    for package, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:45} {cumulative / 1000:9.1f} ms  {cumulative / total:6.1%}")
+    print("\nModules by self import time")
+    for depth, self_us, _, name in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"  {name:45} {self_us / 1000:9.1f} ms")
+    print("\nStartup steps (fresh interpreter each)")
+    for step, code in STARTUP_STEPS.items():
+        print(f"  {step:45} {time_step(code):9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report where a fresh app worker spends its start-up time.")
+    parser.add_argument("--module", default="main5")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    report(args.module, args.top)
+
+
+if __name__ == "__main__":
+    main()
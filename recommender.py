@@ -0,0 +1,190 @@
+import math
+import re
+
+import numpy as np
+
+# Everyday words patients use, mapped onto the vocabulary of the "conditions" lists
+SYNONYMS = {
+    "tummy": "stomach",
+    "belly": "stomach",
+    "abdomen": "stomach",
+    "abdominal": "stomach",
+    "gastric": "stomach",
+    "breathless": "breath",
+    "breathing": "breath",
+    "itchy": "itch",
+    "itching": "itch",
+    "pimple": "acne",
+    "pimples": "acne",
+    "migraine": "headache",
+    "sad": "depression",
+    "depressed": "depression",
+    "anxious": "anxiety",
+    "nervous": "anxiety",
+    "sugar": "diabetes",
+    "diabetic": "diabetes",
+    "bp": "pressure",
+    "hypertension": "pressure",
+    "puking": "vomiting",
+    "throwing": "vomiting",
+    "loose": "diarrhea",
+    "motions": "diarrhea",
+    "renal": "kidney",
+    "cardiac": "heart",
+    "teeth": "tooth",
+    "gum": "gums",
+    "vision": "eye",
+    "sight": "eye",
+    "eyes": "eye",
+    "ears": "ear",
+    "bones": "bone",
+    "joints": "joint",
+    "tired": "fatigue",
+    "tiredness": "fatigue",
+    "exhaustion": "fatigue",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "i", "in",
+    "is", "it", "my", "of", "on", "or", "the", "to", "with", "me", "am", "since", "feel",
+    "feeling", "having", "very", "some", "days", "weeks", "issues", "problems", "symptoms",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+
+# Light suffix stripping so "rashes"/"rash" and "infections"/"infection" share a term
+def stem(word):
+    for suffix, replacement in (("ies", "y"), ("sses", "ss"), ("ing", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            word = word[: -len(suffix)] + replacement
+            break
+    if word.endswith("e") and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        tokens.append(stem(SYNONYMS.get(word, word)))
+    return tokens
+
+
+# BM25 search over doctors' conditions and specialization, blended with rating.
+# The index is built once and updated in place when doctors are added or removed.
+class DoctorRecommender:
+    def __init__(self, doctors=(), k1=1.5, b=0.75, rating_weight=0.2):
+        self.k1 = k1
+        self.b = b
+        self.rating_weight = rating_weight
+        self._doctors = []  # Row -> Doctor, None once removed
+        self._tokens = []  # Row -> indexed tokens
+        self._rows = {}  # doctor_identity_number -> row
+        self._postings = {}  # term -> {row: term frequency}
+        self._posting_arrays = {}  # term -> (rows, frequencies) cache for vectorized scoring
+        self._lengths = []  # Row -> token count, 0 once removed
+        self._ratings = []  # Row -> rating
+        self._dense = None  # (lengths, ratings) as arrays, rebuilt after changes
+        self._profiles = {}  # specialization -> conditions seen for it
+        doctors = list(doctors)
+        for doctor in doctors:
+            if doctor.conditions:
+                self._profiles.setdefault(doctor.specialization, set()).update(doctor.conditions)
+        for doctor in doctors:
+            self.add_doctor(doctor)
+
+    def __len__(self):
+        return len(self._rows)
+
+    # Doctors without a conditions list borrow the conditions of their specialization
+    def _document_text(self, doctor):
+        conditions = doctor.conditions or sorted(self._profiles.get(doctor.specialization, ()))
+        return " ".join([doctor.specialization, *conditions])
+
+    def add_doctor(self, doctor):
+        if doctor.doctor_identity_number in self._rows:
+            self.remove_doctor(doctor.doctor_identity_number)
+        if doctor.conditions:
+            self._profiles.setdefault(doctor.specialization, set()).update(doctor.conditions)
+
+        row = len(self._doctors)
+        tokens = tokenize(self._document_text(doctor))
+        self._doctors.append(doctor)
+        self._tokens.append(tokens)
+        self._rows[doctor.doctor_identity_number] = row
+        self._lengths.append(len(tokens))
+        self._ratings.append(doctor.rating)
+        self._dense = None
+        for term in tokens:
+            postings = self._postings.setdefault(term, {})
+            postings[row] = postings.get(row, 0) + 1
+            self._posting_arrays.pop(term, None)
+
+    def remove_doctor(self, doctor_identity_number):
+        row = self._rows.pop(doctor_identity_number, None)
+        if row is None:
+            return False
+        for term in set(self._tokens[row]):
+            postings = self._postings[term]
+            del postings[row]
+            if not postings:
+                del self._postings[term]
+            self._posting_arrays.pop(term, None)
+        self._doctors[row] = None
+        self._tokens[row] = []
+        self._lengths[row] = 0
+        self._dense = None
+        return True
+
+    def _dense_arrays(self):
+        if self._dense is None:
+            self._dense = (
+                np.asarray(self._lengths, dtype=np.float32),
+                np.asarray(self._ratings, dtype=np.float32),
+            )
+        return self._dense
+
+    def _arrays(self, term):
+        arrays = self._posting_arrays.get(term)
+        if arrays is None:
+            postings = self._postings[term]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+            self._posting_arrays[term] = arrays
+        return arrays
+
+    # Raw BM25 score per row for a free-text query
+    def bm25_scores(self, query):
+        scores = np.zeros(len(self._doctors), dtype=np.float32)
+        active = len(self._rows)
+        if not active:
+            return scores
+        lengths, _ = self._dense_arrays()
+        average_length = float(lengths.sum()) / active
+        for term in set(tokenize(query)):
+            if term not in self._postings:
+                continue
+            rows, frequencies = self._arrays(term)
+            idf = math.log(1 + (active - len(rows) + 0.5) / (len(rows) + 0.5))
+            norms = self.k1 * (1 - self.b + self.b * lengths[rows] / average_length)
+            scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + norms)
+        return scores
+
+    # Top-k (Doctor, score) pairs; relevance is scaled to [0, 1] and blended with rating / 5
+    def recommend(self, query, k=5):
+        scores = self.bm25_scores(query)
+        matched = np.flatnonzero(scores > 0)
+        if not len(matched):
+            return []
+        _, ratings = self._dense_arrays()
+        relevance = scores[matched] / scores[matched].max()
+        blended = (1 - self.rating_weight) * relevance + self.rating_weight * ratings[matched] / 5
+        k = min(k, len(matched))
+        top = np.argpartition(-blended, k - 1)[:k]
+        top = top[np.argsort(-blended[top], kind="stable")]
+        return [(self._doctors[matched[i]], float(blended[i])) for i in top]
@@ -0,0 +1,255 @@
+import re
+from collections import namedtuple
+
+from appointment_actions import apply_appointment_action, pending_appointments
+from booking import MY_APPOINTMENTS_LIMIT, book_appointment, hold_slot, patient_appointments
+from cache import DoctorCache
+from doctor_io import export_rows, import_doctors
+from doctor_records import Doctor
+from doctor_search import NEAREST_COUNT, SEARCH_PAGE_SIZE, nearest_doctors, search_doctors
+from exports import CHUNK_SIZE, PATIENT_EXPORT_FIELDS
+from notifications import (
+    FEED_PAGE_SIZE,
+    MongoNotificationBackend,
+    clear_notifications,
+    count_unread,
+    fetch_notifications,
+    mark_all_read,
+)
+from pagination import PAGE_SIZE, count_matching, fetch_page
+from rollups import doctor_totals, specialization_days
+from slot_holds import release_holds
+from slots import SEARCH_DAYS, first_free_slots, free_slots, next_free_slots, taken_in
+
+# Data access for the pages: one repository per collection, bundled as Repositories.
+# The MongoDB implementations below delegate to the query modules; memory_repositories.py
+# has in-memory ones with the same methods, for running the app and the benchmarks
+# without a database.
+Repositories = namedtuple("Repositories", ["doctors", "users", "appointments", "notifications"])
+
+# Fields shown and exported on the Patient Info page (never the password hash)
+PATIENT_LIST_FIELDS = {field: 1 for field in PATIENT_EXPORT_FIELDS}
+
+# Fields of the Manage Appointments list
+APPOINTMENT_LIST_FIELDS = {
+    "patient_id": 1,
+    "patient_name": 1,
+    "doctor": 1,
+    "doctor_identity_number": 1,
+    "specialization": 1,
+    "date": 1,
+    "appointment_time": 1,
+    "symptoms": 1,
+    "appointment_status": 1,
+}
+
+# Manage Appointments filters: status ("All", "pending", "approved", "rejected"),
+# doctor identity number or "All", and a (first, last) date range or ()
+AppointmentFilter = namedtuple("AppointmentFilter", ["status", "doctor_id", "date_range"])
+PENDING = AppointmentFilter("pending", "All", ())
+
+
+# Users query for patients whose name, username or phone starts with the search text
+def patient_query(search):
+    query = {"type": "patient"}
+    if search:
+        prefix = {"$regex": "^" + re.escape(search), "$options": "i"}
+        query["$or"] = [{"name": prefix}, {"username": prefix}, {"phone": prefix}]
+    return query
+
+
+# Appointments query for an AppointmentFilter
+def appointment_query(filters):
+    query = {}
+    if filters.status == "pending":
+        query["appointment_status"] = {"$in": [None, "pending"]}  # Missing status means pending
+    elif filters.status != "All":
+        query["appointment_status"] = filters.status
+    if filters.doctor_id != "All":
+        query["doctor_identity_number"] = filters.doctor_id
+    if len(filters.date_range) == 2:
+        query["date"] = {"$gte": filters.date_range[0].isoformat(), "$lte": filters.date_range[1].isoformat()}
+    return query
+
+
+# Slot queries shared by both appointment repositories, run by the slots module on their
+# taken(holder_id): a slot is free when it is neither booked nor held by a patient other
+# than holder_id
+class SlotQueries:
+    def free_slots(self, doctor, day, holder_id=None):
+        return free_slots(self.taken(holder_id), doctor, day)
+
+    # The earliest n free slots across the doctors: [(date, "HH:MM", Doctor)]
+    def next_free_slots(self, doctors, n=5, today=None, days=SEARCH_DAYS, holder_id=None):
+        return next_free_slots(self.taken(holder_id), doctors, n, today, days)
+
+    # {doctor_identity_number: (date, "HH:MM")} of each doctor's earliest free slot
+    def first_free_slots(self, doctors, today=None, days=SEARCH_DAYS, holder_id=None):
+        return first_free_slots(self.taken(holder_id), doctors, today, days)
+
+
+# Doctors, read through a DoctorCache that every write here invalidates
+class MongoDoctorRepo:
+    def __init__(self, db):
+        self.db = db
+        self.cache = DoctorCache(db)
+
+    def get(self, doctor_identity_number):
+        return self.cache.by_id(doctor_identity_number)
+
+    def by_specialization(self, specialization):
+        return self.cache.by_specialization(specialization)
+
+    def specializations(self):
+        return self.cache.specializations()
+
+    def labels(self):
+        return self.cache.labels()
+
+    def all_documents(self):
+        return self.cache.all_documents()
+
+    def all(self):
+        return [Doctor.from_document(document) for document in self.db.doctors.find()]
+
+    def add(self, doctor):
+        self.db.doctors.insert_one(doctor.to_document())
+        self.cache.invalidate_doctor(doctor.doctor_identity_number, doctor.specialization)
+
+    # The deleted Doctor, or None if there was none with this identity number
+    def delete(self, doctor_identity_number):
+        document = self.db.doctors.find_one_and_delete({"doctor_identity_number": doctor_identity_number})
+        if document is None:
+            return None
+        self.cache.invalidate_doctor(doctor_identity_number, document.get("specialization"))
+        return Doctor.from_document(document)
+
+    def search(self, selected, min_rating=0.0, sort="rating", page=0, page_size=SEARCH_PAGE_SIZE, today=None):
+        return search_doctors(self.db, selected, min_rating, sort, page, page_size, today)
+
+    def nearest(self, pincode, specialization=None, n=NEAREST_COUNT):
+        return nearest_doctors(self.db, pincode, specialization, n)
+
+    def import_rows(self, rows, dry_run=True):
+        summary = import_doctors(self.db, rows, dry_run=dry_run)
+        if not dry_run and (summary["inserted"] or summary["updated"]):
+            self.cache.cache.invalidate()
+        return summary
+
+    def export_rows(self):
+        return export_rows(self.db)
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+
+# Users; listings read from listing_db (see db_config.listing_database)
+class MongoUserRepo:
+    def __init__(self, db, listing_db=None):
+        self.db = db
+        self.listing_db = listing_db if listing_db is not None else db
+
+    def authenticate(self, username, password_hash, user_type):
+        return self.db.users.find_one({"username": username, "password": password_hash, "type": user_type})
+
+    # Insert a new user document; False if the username is taken
+    def register(self, user):
+        if self.db.users.find_one({"username": user["username"]}):
+            return False
+        self.db.users.insert_one(user)
+        return True
+
+    # One keyset page of matching patients, newest first: (patients, has_more)
+    def patients_page(self, search, after=None, page_size=PAGE_SIZE):
+        return fetch_page(self.listing_db.users, patient_query(search), PATIENT_LIST_FIELDS, page_size, after)
+
+    def count_patients(self, search):
+        return count_matching(self.listing_db.users, patient_query(search))
+
+    # Every patient, streamed for the registry export
+    def all_patients(self):
+        return self.listing_db.users.find({"type": "patient"}, PATIENT_LIST_FIELDS).batch_size(CHUNK_SIZE)
+
+
+# Appointments; bookings are written through booking_db (see db_config.booking_database)
+# and the dashboard reads its rollups from listing_db
+class MongoAppointmentRepo(SlotQueries):
+    def __init__(self, db, booking_db=None, listing_db=None):
+        self.db = db
+        self.booking_db = booking_db if booking_db is not None else db
+        self.listing_db = listing_db if listing_db is not None else db
+
+    def taken(self, holder_id=None):
+        return taken_in(self.db, holder_id)
+
+    # Hold a slot while the patient fills in the booking form; returns when the hold
+    # expires. Raises SlotTakenError if it is booked or held by another patient.
+    def hold(self, doctor, day, appointment_time, patient_id):
+        return hold_slot(self.db, doctor, day, appointment_time, patient_id)
+
+    def release_holds(self, patient_id):
+        release_holds(self.db, patient_id)
+
+    # Turns the patient's hold into the appointment; raises SlotTakenError if the slot
+    # is already booked or held by another patient
+    def book(self, doctor, day, appointment_time, patient_id, patient_name, age, symptoms):
+        return book_appointment(self.booking_db, doctor, day, appointment_time, patient_id, patient_name, age, symptoms)
+
+    def for_patient(self, patient_id, today, upcoming=True, limit=MY_APPOINTMENTS_LIMIT):
+        return patient_appointments(self.db, patient_id, today, upcoming, limit)
+
+    # One keyset page of appointments matching the filters, newest first: (appointments, has_more)
+    def page(self, filters, after=None, page_size=PAGE_SIZE):
+        return fetch_page(self.db.appointments, appointment_query(filters), APPOINTMENT_LIST_FIELDS, page_size, after)
+
+    def count(self, filters):
+        return count_matching(self.db.appointments, appointment_query(filters))
+
+    def count_pending(self, filters):
+        return count_matching(self.db.appointments, appointment_query(filters._replace(status="pending")))
+
+    def pending(self, filters):
+        return pending_appointments(self.db, appointment_query(filters))
+
+    # Approve, reject or delete; returns the appointments that changed
+    def apply_action(self, appointments, action, outbox):
+        return apply_appointment_action(self.db, appointments, action, outbox)
+
+    def specialization_days(self, first_date, last_date):
+        return specialization_days(self.listing_db, first_date, last_date)
+
+    def doctor_totals(self, first_date, last_date):
+        return doctor_totals(self.listing_db, first_date, last_date)
+
+
+# Notifications; also a delivery backend for the NotificationOutbox
+class MongoNotificationRepo:
+    name = "mongo"
+
+    def __init__(self, db):
+        self.db = db
+        self.backend = MongoNotificationBackend(db)
+
+    def deliver(self, notifications):
+        self.backend.deliver(notifications)
+
+    def fetch(self, recipient_id, newer_than=None, older_than=None, limit=FEED_PAGE_SIZE):
+        return fetch_notifications(self.db, recipient_id, newer_than, older_than, limit)
+
+    def count_unread(self, recipient_id):
+        return count_unread(self.db, recipient_id)
+
+    def mark_all_read(self, recipient_id):
+        mark_all_read(self.db, recipient_id)
+
+    def clear(self, recipient_id):
+        clear_notifications(self.db, recipient_id)
+
+
+def mongo_repositories(db, booking_db=None, listing_db=None):
+    return Repositories(
+        doctors=MongoDoctorRepo(db),
+        users=MongoUserRepo(db, listing_db),
+        appointments=MongoAppointmentRepo(db, booking_db, listing_db),
+        notifications=MongoNotificationRepo(db),
+    )
@@ -0,0 +1,144 @@
+from collections import Counter
+
+from pymongo import UpdateOne
+
+# Appointment counts maintained on every booking and status change so the admin
+# Dashboard never reads the appointments collection:
+#   rollup_doctor_day          one document per (doctor_identity_number, appointment date)
+#   rollup_specialization_day  one document per (specialization, appointment date)
+# Each holds "total" plus one counter per status.
+ROLLUPS_VERSION = 2  # 2: doctors keyed by identity number instead of name
+STATUSES = ["pending", "approved", "rejected"]
+UNKNOWN_SPECIALIZATION = "Unknown"
+
+
+def appointment_status(appointment):
+    return appointment.get("appointment_status") or "pending"
+
+
+# (collection, _id, fields set on insert) of both rollup documents an appointment counts towards
+def _rollup_keys(appointment):
+    doctor_id, day = appointment.get("doctor_identity_number"), appointment.get("date")
+    specialization = appointment.get("specialization") or UNKNOWN_SPECIALIZATION
+    return [
+        (
+            "rollup_doctor_day",
+            {"doctor_identity_number": doctor_id, "date": day},
+            {"doctor_identity_number": doctor_id, "date": day, "doctor": appointment.get("doctor"), "specialization": specialization},
+        ),
+        (
+            "rollup_specialization_day",
+            {"specialization": specialization, "date": day},
+            {"specialization": specialization, "date": day},
+        ),
+    ]
+
+
+# Apply counter changes for many appointments with one bulk_write per rollup collection.
+# changes is an iterable of (appointment, {counter: delta})
+def _apply_changes(db, changes):
+    increments = {}  # (collection, key) -> (Counter, fields set on insert)
+    for appointment, deltas in changes:
+        for collection, key, fields in _rollup_keys(appointment):
+            entry = increments.setdefault((collection, tuple(key.items())), (Counter(), fields))
+            entry[0].update(deltas)
+
+    operations = {}
+    for (collection, key), (deltas, fields) in increments.items():
+        deltas = {counter: delta for counter, delta in deltas.items() if delta}
+        if deltas:
+            # New documents start every counter the update does not touch at zero
+            zeros = {counter: 0 for counter in ["total", *STATUSES] if counter not in deltas}
+            operations.setdefault(collection, []).append(
+                UpdateOne({"_id": dict(key)}, {"$inc": deltas, "$setOnInsert": {**fields, **zeros}}, upsert=True)
+            )
+    for collection, collection_operations in operations.items():
+        db[collection].bulk_write(collection_operations, ordered=False)
+
+
+def record_booking(db, appointment):
+    _apply_changes(db, [(appointment, {"total": 1, appointment_status(appointment): 1})])
+
+
+# Move appointments from their current status to new_status, or remove them from the
+# rollups when new_status is None (deleted)
+def record_status_change(db, appointments, new_status):
+    changes = []
+    for appointment in appointments:
+        old_status = appointment_status(appointment)
+        if new_status is None:
+            changes.append((appointment, {"total": -1, old_status: -1}))
+        elif new_status != old_status:
+            changes.append((appointment, {old_status: -1, new_status: 1}))
+    _apply_changes(db, changes)
+
+
+def _status_sum(status):
+    return {"$sum": {"$cond": [{"$eq": [{"$ifNull": ["$appointment_status", "pending"]}, status]}, 1, 0]}}
+
+
+# Recompute both rollups from the appointments with two aggregations that $merge into
+# the rollup collections; the specialization rollup is built from the doctor rollup.
+# Appointments without a doctor id share a null key, as in record_booking.
+def backfill_rollups(db):
+    db.appointments.aggregate([
+        {
+            "$group": {
+                "_id": {"doctor_identity_number": {"$ifNull": ["$doctor_identity_number", None]}, "date": "$date"},
+                "doctor": {"$first": "$doctor"},
+                "specialization": {"$first": {"$ifNull": ["$specialization", UNKNOWN_SPECIALIZATION]}},
+                "total": {"$sum": 1},
+                **{status: _status_sum(status) for status in STATUSES},
+            }
+        },
+        {"$addFields": {"doctor_identity_number": "$_id.doctor_identity_number", "date": "$_id.date"}},
+        {"$merge": {"into": "rollup_doctor_day", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ])
+    db.rollup_doctor_day.aggregate([
+        {
+            "$group": {
+                "_id": {"specialization": "$specialization", "date": "$date"},
+                "total": {"$sum": "$total"},
+                **{status: {"$sum": "$" + status} for status in STATUSES},
+            }
+        },
+        {"$addFields": {"specialization": "$_id.specialization", "date": "$_id.date"}},
+        {"$merge": {"into": "rollup_specialization_day", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ])
+
+
+# Backfill once per database; the version stored in meta marks the rollups as maintained
+def ensure_rollups(db):
+    if db.meta.find_one({"_id": "rollups_version", "version": ROLLUPS_VERSION}):
+        return False
+    db.rollup_doctor_day.delete_many({})
+    db.rollup_specialization_day.delete_many({})
+    backfill_rollups(db)
+    db.meta.update_one({"_id": "rollups_version"}, {"$set": {"version": ROLLUPS_VERSION}}, upsert=True)
+    return True
+
+
+def _date_range(first_date, last_date):
+    return {"date": {"$gte": first_date.isoformat(), "$lte": last_date.isoformat()}}
+
+
+# Dashboard reads: both are bounded by the number of doctors or specializations times
+# the days in the range, whatever the number of appointments
+def specialization_days(db, first_date, last_date):
+    return list(db.rollup_specialization_day.find(_date_range(first_date, last_date), {"_id": 0}))
+
+
+def doctor_totals(db, first_date, last_date):
+    return list(db.rollup_doctor_day.aggregate([
+        {"$match": _date_range(first_date, last_date)},
+        {
+            "$group": {
+                "_id": "$doctor_identity_number",
+                "doctor": {"$first": "$doctor"},
+                "specialization": {"$first": "$specialization"},
+                "total": {"$sum": "$total"},
+                **{status: {"$sum": "$" + status} for status in STATUSES},
+            }
+        },
+        {"$sort": {"total": -1}},
+    ]))
@@ -0,0 +1,78 @@
+import hashlib
+import json
+from datetime import datetime
+
+from pymongo import ReplaceOne, UpdateOne
+
+from doctor_records import SCHEMA_VERSION, Doctor
+
+SEED_VERSION_ID = "seed_version"
+BATCH_SIZE = 500
+
+
+# Stable fingerprint of everything the seed writes, so a changed roster triggers a re-seed
+def seed_hash(doctors, users):
+    payload = json.dumps(
+        {"doctors": [doctor.to_document() for doctor in doctors], "users": users},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# Insert missing doctors (already normalized Doctor records) in one ordered bulk write
+def seed_doctors(db, doctors):
+    operations = [
+        UpdateOne(
+            {"doctor_identity_number": doctor.doctor_identity_number},
+            {"$setOnInsert": doctor.to_document()},
+            upsert=True,
+        )
+        for doctor in doctors
+    ]
+    return db.doctors.bulk_write(operations, ordered=True)
+
+
+# Rewrite doctor documents stored before normalization (or under an older schema version)
+def normalize_stored_doctors(db):
+    operations = []
+    for document in db.doctors.find({"schema_version": {"$ne": SCHEMA_VERSION}}):
+        try:
+            doctor = Doctor.from_document(document)
+        except (KeyError, ValueError):
+            continue  # Leave malformed documents for an admin to fix
+        operations.append(ReplaceOne({"_id": document["_id"]}, doctor.to_document()))
+        if len(operations) >= BATCH_SIZE:
+            db.doctors.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        db.doctors.bulk_write(operations, ordered=False)
+
+
+# Insert missing default users (e.g. the admin account) without touching existing ones
+def seed_users(db, users):
+    if not users:
+        return None
+    operations = [
+        UpdateOne({"username": user["username"]}, {"$setOnInsert": user}, upsert=True)
+        for user in users
+    ]
+    return db.users.bulk_write(operations, ordered=True)
+
+
+# Seed the database unless the stored seed version already matches; returns True if it wrote
+def seed_database(db, doctors, users):
+    version = seed_hash(doctors, users)
+    current = db.meta.find_one({"_id": SEED_VERSION_ID})
+    if current and current.get("hash") == version:
+        return False
+
+    seed_doctors(db, doctors)
+    normalize_stored_doctors(db)
+    seed_users(db, users)
+    db.meta.update_one(
+        {"_id": SEED_VERSION_ID},
+        {"$set": {"hash": version, "seeded_at": datetime.now()}},
+        upsert=True,
+    )
+    return True
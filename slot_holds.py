@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+# Short-lived holds on appointment slots. Choosing a slot on Book Appointment holds it
+# for the patient while they fill in the form, other patients do not see it as free,
+# and submitting turns the hold into the appointment. A patient holds one slot at a
+# time. The expires_at TTL index (indexes.py) deletes expired holds, but the TTL
+# monitor only runs about once a minute, so every query here also checks expires_at.
+HOLD_DURATION = timedelta(minutes=5)
+
+
+# expires_at is stored in UTC, the clock TTL indexes compare against
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+# The fields identifying a slot, shared by holds and appointments
+def slot_filter(doctor, day, appointment_time):
+    return {
+        "doctor_identity_number": doctor.doctor_identity_number,
+        "date": day.isoformat(),
+        "appointment_time": appointment_time,
+    }
+
+
+# Hold a slot for holder_id and release their other holds; an expired hold of someone
+# else is taken over. Returns when the hold expires, or None if another patient holds it.
+def place_hold(db, doctor, day, appointment_time, holder_id, now=None):
+    now = now or utc_now()
+    slot = slot_filter(doctor, day, appointment_time)
+    db.slot_holds.delete_many({"holder_id": holder_id, "$nor": [slot]})
+    expires_at = now + HOLD_DURATION
+    try:
+        # A live hold of someone else does not match, so the upsert hits the unique index
+        db.slot_holds.update_one(
+            {**slot, "$or": [{"holder_id": holder_id}, {"expires_at": {"$lte": now}}]},
+            {"$set": {"holder_id": holder_id, "expires_at": expires_at}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return None
+    return expires_at
+
+
+# Whether a patient other than holder_id has a live hold on the slot
+def held_by_other(db, doctor, day, appointment_time, holder_id, now=None):
+    query = {
+        **slot_filter(doctor, day, appointment_time),
+        "holder_id": {"$ne": holder_id},
+        "expires_at": {"$gt": now or utc_now()},
+    }
+    return db.slot_holds.count_documents(query, limit=1) > 0
+
+
+# Live holds of everyone but holder_id, in the form slots.booked_labels returns:
+# {(doctor_identity_number, iso date): [labels]}
+def held_labels(db, doctors, first_date, last_date, holder_id=None, now=None):
+    query = {
+        "doctor_identity_number": {"$in": list({doctor.doctor_identity_number for doctor in doctors})},
+        "date": {"$gte": first_date.isoformat(), "$lte": last_date.isoformat()},
+        "expires_at": {"$gt": now or utc_now()},
+    }
+    if holder_id is not None:
+        query["holder_id"] = {"$ne": holder_id}
+    held = {}
+    for hold in db.slot_holds.find(query, {"_id": 0, "doctor_identity_number": 1, "date": 1, "appointment_time": 1}):
+        held.setdefault((hold["doctor_identity_number"], hold["date"]), []).append(hold["appointment_time"])
+    return held
+
+
+def release_hold(db, doctor, day, appointment_time, holder_id):
+    db.slot_holds.delete_one({**slot_filter(doctor, day, appointment_time), "holder_id": holder_id})
+
+
+# Release every hold of holder_id, e.g. when they log out
+def release_holds(db, holder_id):
+    db.slot_holds.delete_many({"holder_id": holder_id})
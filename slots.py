@@ -0,0 +1,177 @@
+import heapq
+from itertools import repeat
+from datetime import date as date_type
+from datetime import timedelta
+
+from doctor_records import format_minute, parse_minute
+from slot_holds import held_labels
+
+SLOT_MINUTES = 30
+SEARCH_DAYS = 30
+
+# A doctor-day is an int bitset: bit i is the slot starting at
+# doctor.start_minute + i * SLOT_MINUTES (the end time itself is bookable)
+
+
+def slot_count(doctor):
+    return (doctor.end_minute - doctor.start_minute) // SLOT_MINUTES + 1
+
+
+# Every slot of the doctor's working day set
+def day_mask(doctor):
+    return (1 << slot_count(doctor)) - 1
+
+
+# Bit index for an "HH:MM" label, or None if it is not one of the doctor's slots
+def slot_index(doctor, label):
+    try:
+        offset = parse_minute(label) - doctor.start_minute
+    except ValueError:
+        return None
+    if offset < 0 or offset % SLOT_MINUTES:
+        return None
+    index = offset // SLOT_MINUTES
+    return index if index < slot_count(doctor) else None
+
+
+def slot_minute(doctor, index):
+    return doctor.start_minute + index * SLOT_MINUTES
+
+
+# Start minutes of the set slots, in ascending order
+def mask_minutes(doctor, mask):
+    while mask:
+        low_bit = mask & -mask
+        yield slot_minute(doctor, low_bit.bit_length() - 1)
+        mask ^= low_bit
+
+
+def mask_labels(doctor, mask):
+    return [format_minute(minute) for minute in mask_minutes(doctor, mask)]
+
+
+# Working dates in the search window, today included
+def working_dates(doctor, today=None, days=SEARCH_DAYS):
+    today = today or date_type.today()
+    return [today + timedelta(days=i) for i in range(days) if doctor.works_on(today + timedelta(days=i))]
+
+
+# Booked slots of every doctor/date pair in one appointments query, served by the
+# doctor_slot_unique index: {(doctor_identity_number, iso date): [labels]}
+def booked_labels(db, doctors, first_date, last_date):
+    doctor_ids = list({doctor.doctor_identity_number for doctor in doctors})
+    query = {
+        "doctor_identity_number": {"$in": doctor_ids},
+        "date": {"$gte": first_date.isoformat(), "$lte": last_date.isoformat()},
+    }
+    projection = {"_id": 0, "doctor_identity_number": 1, "date": 1, "appointment_time": 1}
+    booked = {}
+    for appointment in db.appointments.find(query, projection):
+        key = (appointment["doctor_identity_number"], appointment["date"])
+        booked.setdefault(key, []).append(appointment["appointment_time"])
+    return booked
+
+
+# Slots nobody but holder_id can book: the booked ones and those other patients hold
+def taken_labels(db, doctors, first_date, last_date, holder_id=None):
+    return merge_labels(
+        booked_labels(db, doctors, first_date, last_date), held_labels(db, doctors, first_date, last_date, holder_id)
+    )
+
+
+def merge_labels(booked, held):
+    taken = {key: list(labels) for key, labels in booked.items()}
+    for key, labels in held.items():
+        taken.setdefault(key, []).extend(labels)
+    return taken
+
+
+# taken_labels of db as the `taken` function the slot queries at the end take
+def taken_in(db, holder_id=None):
+    return lambda doctors, first_date, last_date: taken_labels(db, doctors, first_date, last_date, holder_id)
+
+
+def booked_mask(doctor, labels):
+    mask = 0
+    for label in labels:
+        index = slot_index(doctor, label)
+        if index is not None:
+            mask |= 1 << index
+    return mask
+
+
+# The functions below take `booked` in the form booked_labels returns, so any store
+# that can produce it (see memory_repositories.py) shares the slot arithmetic
+
+# Free slot labels for one doctor on one date
+def free_labels(doctor, day, booked):
+    if not doctor.works_on(day):
+        return []
+    labels = booked.get((doctor.doctor_identity_number, day.isoformat()), [])
+    return mask_labels(doctor, day_mask(doctor) & ~booked_mask(doctor, labels))
+
+
+# The earliest n free slots across all given doctors from `today` on, as
+# (date, "HH:MM", doctor) tuples in chronological order
+def earliest_free_slots(doctors, booked, n, today, days=SEARCH_DAYS):
+    results = []
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        streams = []
+        for position, doctor in enumerate(doctors):
+            if not doctor.works_on(day):
+                continue
+            free = day_mask(doctor) & ~booked_mask(doctor, booked.get((doctor.doctor_identity_number, day.isoformat()), ()))
+            if free:
+                streams.append(zip(mask_minutes(doctor, free), repeat(position)))
+        for minute, position in heapq.merge(*streams):
+            results.append((day, format_minute(minute), doctors[position]))
+            if len(results) == n:
+                return results
+    return results
+
+
+# Earliest free slot of each doctor from `today` on: {doctor_identity_number: (date, "HH:MM")};
+# fully booked doctors are left out
+def first_free_slot_of_each(doctors, booked, today, days=SEARCH_DAYS):
+    first = {}
+    for doctor in doctors:
+        for offset in range(days):
+            day = today + timedelta(days=offset)
+            if not doctor.works_on(day):
+                continue
+            free = day_mask(doctor) & ~booked_mask(doctor, booked.get((doctor.doctor_identity_number, day.isoformat()), ()))
+            if free:
+                first[doctor.doctor_identity_number] = (day, format_minute(next(mask_minutes(doctor, free))))
+                break
+    return first
+
+
+# The slot queries below read the slots that are not free through `taken`, a function
+# (doctors, first_date, last_date) -> {(doctor_identity_number, iso date): [labels]}:
+# taken_in(db) for MongoDB (booked or held by another patient, see slot_holds.py), or
+# an appointment repository's taken (repositories.SlotQueries). Each makes one call.
+
+# Free slot labels for one doctor on one date
+def free_slots(taken, doctor, day):
+    if not doctor.works_on(day):
+        return []
+    return free_labels(doctor, day, taken([doctor], day, day))
+
+
+# The earliest n free slots across all given doctors within the search window
+def next_free_slots(taken, doctors, n=5, today=None, days=SEARCH_DAYS):
+    doctors = list(doctors)
+    today = today or date_type.today()
+    if not doctors or n <= 0:
+        return []
+    return earliest_free_slots(doctors, taken(doctors, today, today + timedelta(days=days - 1)), n, today, days)
+
+
+# Earliest free slot of each doctor within the search window
+def first_free_slots(taken, doctors, today=None, days=SEARCH_DAYS):
+    doctors = list(doctors)
+    today = today or date_type.today()
+    if not doctors:
+        return {}
+    return first_free_slot_of_each(doctors, taken(doctors, today, today + timedelta(days=days - 1)), today, days)
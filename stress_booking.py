@@ -0,0 +1,74 @@
+import argparse
+import sys
+import threading
+from datetime import date, timedelta
+
+from booking import SlotTakenError, book_appointment
+from db_config import booking_database, create_client, mongo_settings
+from doctor_records import load_doctors
+from indexes import ensure_indexes
+from slots import working_dates
+
+
+# Hammer one slot from many threads and check that exactly one booking wins.
+# Runs against a scratch database on a local mongod, or mongomock with --in-memory.
+def main():
+    parser = argparse.ArgumentParser(description="Check that concurrent bookings of one slot have exactly one winner.")
+    parser.add_argument("--uri", help="default: the app's configured URI (db_config.py)")
+    parser.add_argument("--database", default="hospital_db_stress")
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock instead of a local mongod")
+    args = parser.parse_args()
+
+    if args.in_memory:
+        try:
+            import mongomock
+        except ImportError:
+            parser.error("--in-memory needs mongomock: pip install -r requirements-dev.txt")
+
+        client = mongomock.MongoClient()
+    else:
+        settings = mongo_settings(uri=args.uri)
+        client = create_client(settings)
+    client.drop_database(args.database)
+    db = client[args.database]
+    ensure_indexes(db)
+    if not args.in_memory:
+        db = booking_database(db, settings)  # Book with the app's write concern
+
+    doctor = load_doctors()[0]
+    day = working_dates(doctor, date.today() + timedelta(days=1))[0]
+    appointment_time = doctor.availability.split("-")[0]
+
+    barrier = threading.Barrier(args.threads)
+    winners, losers, errors = [], [], []
+
+    def attempt(number):
+        barrier.wait()
+        try:
+            winners.append(book_appointment(db, doctor, day, appointment_time, None, f"Patient {number}", 30, "stress test"))
+        except SlotTakenError:
+            losers.append(number)
+        except Exception as error:  # Anything else is a failure of the check
+            errors.append(error)
+
+    threads = [threading.Thread(target=attempt, args=(number,)) for number in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = db.appointments.count_documents({
+        "doctor_identity_number": doctor.doctor_identity_number,
+        "date": day.isoformat(),
+        "appointment_time": appointment_time,
+    })
+    client.drop_database(args.database)
+
+    print(f"{len(winners)} winner(s), {len(losers)} slot-taken response(s), {len(errors)} error(s), {stored} stored")
+    if len(winners) != 1 or stored != 1 or errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import argparse
+import random
+from datetime import date, datetime, timedelta
+
+from doctor_records import WEEKDAYS, load_doctors, normalize_doctor
+
+# Synthetic doctors, patients, appointments and notifications at any scale, shaped
+# like the bundled roster. Populate a local database with e.g.
+#   python synthetic_data.py --doctors 5000 --patients 20000 --appointments 1000000
+
+PATIENT_PASSWORD = "patient123"
+INSERT_CHUNK = 10_000
+PAST_DAYS = 365  # Appointment history covers the past year plus the next 30 days
+SLOT_LABELS = [f"{hour:02d}:{minute:02d}" for hour in range(8, 19) for minute in (0, 30)]
+AVAILABILITY_WINDOWS = [f"{start:02d}:00-{end:02d}:00" for start in (8, 9, 10) for end in (16, 17, 18, 19)]
+FIRST_NAMES = [
+    "Aarav", "Ananya", "Arjun", "Deepa", "Divya", "Ganesh", "Harish", "Kavya", "Kiran", "Lakshmi",
+    "Manjunath", "Meera", "Naveen", "Pooja", "Prakash", "Priya", "Rahul", "Ramesh", "Rekha", "Sahana",
+    "Sandeep", "Shreya", "Sneha", "Srinivas", "Suresh", "Swathi", "Vikram", "Vinay", "Yamuna", "Zoya",
+]
+LAST_NAMES = [
+    "Acharya", "Bhat", "Gowda", "Hegde", "Iyer", "Joshi", "Kamath", "Kulkarni", "Menon", "Naik",
+    "Nair", "Patil", "Pai", "Rao", "Reddy", "Shetty", "Sharma", "Shenoy", "Upadhyaya", "Urs",
+]
+SYMPTOMS = ["fever", "headache", "back pain", "cough", "skin rash", "joint pain", "stomach ache", "fatigue"]
+
+
+def _person_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+# Raw doctor dicts in both roster layouts: roughly 30% hospital_name/hospital_location/
+# availability with a working_days list, the rest hospital/address/working_hours/conditions
+def generate_doctors(n, rng, start_identity_number=100000):
+    roster = load_doctors()
+    hospitals = sorted({(doctor.hospital_name, doctor.hospital_location) for doctor in roster})
+    conditions = {}
+    for doctor in roster:
+        conditions.setdefault(doctor.specialization, set()).update(doctor.conditions)
+    specializations = sorted(conditions)
+
+    doctors = []
+    for i in range(n):
+        name = f"Dr. {_person_name(rng)}"
+        specialization = rng.choice(specializations)
+        hospital_name, hospital_location = rng.choice(hospitals)
+        working_days = rng.sample(WEEKDAYS, rng.randint(3, 6))
+        doctor = {
+            "doctor_identity_number": str(start_identity_number + i),
+            "name": name,
+            "specialization": specialization,
+            "contact": f"9{rng.randrange(10**9):09d}",
+            "email": name.lower().replace(" ", ".") + "@hospital.com",
+            "rating": f"{rng.uniform(0, 5):.1f}",
+        }
+        if rng.random() < 0.3:
+            doctor.update({
+                "hospital_name": hospital_name,
+                "hospital_location": hospital_location,
+                "availability": rng.choice(AVAILABILITY_WINDOWS),
+                "working_days": working_days,
+            })
+        else:
+            known_conditions = sorted(conditions[specialization]) or [specialization.lower()]
+            doctor.update({
+                "conditions": ", ".join(rng.sample(known_conditions, min(len(known_conditions), 15))),
+                "hospital": hospital_name,
+                "address": hospital_location.replace(", ", "\n", 1),
+                "working_hours": rng.choice(AVAILABILITY_WINDOWS),
+                "working_days": ", ".join(working_days),
+            })
+        doctors.append(doctor)
+    return doctors
+
+
+def generate_patients(n, rng, password=PATIENT_PASSWORD):
+    from main5 import hash_password
+
+    hashed_password = hash_password(password)
+    patients = []
+    for i in range(n):
+        name = _person_name(rng)
+        patients.append({
+            "username": f"patient{i}",
+            "password": hashed_password,
+            "type": "patient",
+            "name": name,
+            "age": rng.randint(1, 95),
+            "phone": f"9{rng.randrange(10**9):09d}",
+            "email": f"patient{i}@example.com",
+        })
+    return patients
+
+
+# n appointments on distinct (doctor, date, slot) combinations, for Doctor records and
+# stored patient documents (with _id)
+def generate_appointments(doctors, patients, n, rng, today=None):
+    today = today or date.today()
+    days = PAST_DAYS + 30
+    space = len(doctors) * days * len(SLOT_LABELS)
+    if n > space:
+        raise ValueError(f"{n} appointments do not fit into {space} doctor slots")
+    for index in rng.sample(range(space), n):
+        index, slot = divmod(index, len(SLOT_LABELS))
+        doctor_index, day = divmod(index, days)
+        doctor = doctors[doctor_index]
+        patient = rng.choice(patients)
+        appointment_date = today + timedelta(days=day - PAST_DAYS)
+        status = rng.choice([None, "approved", "approved", "rejected"]) if appointment_date < today else None
+        appointment = {
+            "patient_id": patient["_id"],
+            "patient_name": patient["name"],
+            "age": patient["age"],
+            "symptoms": rng.choice(SYMPTOMS),
+            "appointment_time": SLOT_LABELS[slot],
+            "date": appointment_date.isoformat(),
+            "doctor": doctor.name,
+            "doctor_identity_number": doctor.doctor_identity_number,
+            "specialization": doctor.specialization,
+        }
+        if status:
+            appointment["appointment_status"] = status
+        yield appointment
+
+
+def generate_notifications(patients, per_patient, rng, now=None):
+    now = now or datetime.now()
+    for patient in patients:
+        for i in range(per_patient):
+            verb = rng.choice(["approved", "rejected", "deleted by the admin"])
+            yield {
+                "recipient_id": patient["_id"],
+                "recipient": patient["name"],
+                "message": f"Your appointment at {rng.choice(SLOT_LABELS)} has been {verb}.",
+                "read": rng.random() < 0.7,
+                "timestamp": now - timedelta(minutes=rng.randrange(60 * 24 * 60)),
+            }
+
+
+def insert_chunked(collection, documents, chunk_size=INSERT_CHUNK):
+    chunk = []
+    inserted = 0
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) >= chunk_size:
+            collection.insert_many(chunk, ordered=False)
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        collection.insert_many(chunk, ordered=False)
+        inserted += len(chunk)
+    return inserted
+
+
+# Fill a database with synthetic data; doctors are stored normalized like the seeded roster.
+# Returns the Doctor records and the stored patient documents.
+def populate(db, doctors=200, patients=1000, appointments=10_000, notifications_per_patient=20, seed=0):
+    rng = random.Random(seed)
+    doctor_records = [normalize_doctor(doctor) for doctor in generate_doctors(doctors, rng)]
+    insert_chunked(db.doctors, (doctor.to_document() for doctor in doctor_records))
+    patient_documents = generate_patients(patients, rng)
+    insert_chunked(db.users, patient_documents)  # insert_many sets each document's _id
+    insert_chunked(db.appointments, generate_appointments(doctor_records, patient_documents, appointments, rng))
+    insert_chunked(db.notifications, generate_notifications(patient_documents, notifications_per_patient, rng))
+    return doctor_records, patient_documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a MongoDB database with synthetic hospital data.")
+    parser.add_argument("--uri", help="default: the app's configured URI (db_config.py)")
+    parser.add_argument("--database", help="default: the app's configured database")
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--appointments", type=int, default=10_000)
+    parser.add_argument("--notifications-per-patient", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from db_config import create_client, mongo_settings
+    from indexes import ensure_indexes
+    from rollups import ensure_rollups
+
+    settings = mongo_settings(uri=args.uri, database=args.database)
+    db = create_client(settings)[settings["database"]]
+    ensure_indexes(db)
+    populate(db, args.doctors, args.patients, args.appointments, args.notifications_per_patient, args.seed)
+    # The appointments were inserted directly, so rebuild the dashboard rollups
+    db.meta.delete_one({"_id": "rollups_version"})
+    ensure_rollups(db)
+    print(
+        f"Inserted {args.doctors} doctors, {args.patients} patients, {args.appointments} appointments "
+        f"and {args.patients * args.notifications_per_patient} notifications into {settings['database']}. "
+        f"Patients log in as patient<N> / {PATIENT_PASSWORD}."
+    )
+
+
+if __name__ == "__main__":
+    main()